@@ -1,19 +1,35 @@
-import base64
-import json
+from __future__ import annotations
+
+import asyncio
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from pathlib import Path
-from typing import Any, Optional
+from functools import lru_cache
+from typing import Any, AsyncGenerator, Generator, Optional
 
 import anthropic
-
-from prompter.image_data import url_to_b64
+import httpx
+
+from prompter import serialization
+from prompter.compression import AsyncCompressingTransport, CompressingTransport
+from prompter.dispatch import resolve_converter
+from prompter.http_clients import HTTP2_ENABLED, HTTP_LIMITS
+from prompter.image_data import (
+    aprefetch_urls,
+    cached_url_to_b64,
+    file_to_b64,
+    prefetch_urls,
+)
 from prompter.schemas import (
     Assistant,
+    AsyncResponseStream,
     Block,
     Document,
     Image,
     LLMResponse,
     Prompt,
+    ResponseStream,
     System,
     Text,
     Tool,
@@ -23,328 +39,717 @@ from prompter.schemas import (
 )
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AnthropicParams:
     max_tokens: int = 1024
     model: str = "claude-3-5-sonnet-latest"
     temperature: float = 0.0
+    enable_prompt_cache: bool = False
+    cache_breakpoints: int = 2
+    cache_min_tokens: int = 1024
+    inline_image_urls: bool = False
+
+
+DEFAULT_PARAMS = AnthropicParams()
+
+MAX_CACHE_BREAKPOINTS = 4
+EPHEMERAL_CACHE_CONTROL = {"type": "ephemeral"}
+
+DEFAULT_MAX_CONCURRENCY = 16
+BATCH_POLL_INITIAL_SECONDS = 1.0
+BATCH_POLL_MAX_SECONDS = 60.0
+DEFAULT_ROW_BATCH_SIZE = 8
+MAX_ROW_BATCH_SIZE = 32
+
+ROWS_TOOL = Tool(
+    name="record_rows",
+    description="Record the answer for every input row, keyed by its row id",
+    params={
+        "type": "object",
+        "properties": {
+            "rows": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "id": {"type": "integer"},
+                        "output": {"type": "string"},
+                    },
+                    "required": ["id", "output"],
+                },
+            }
+        },
+        "required": ["rows"],
+    },
+)
 
 
-class ClaudeExecutor:
-    class Converters:
-        @staticmethod
-        def block_to_anthropic_content(block: Block) -> list[dict[str, Any]]:
-            block_converters = {
-                User: ClaudeExecutor.Converters._convert_user_block,
-                Assistant: ClaudeExecutor.Converters._convert_assistant_block,
-                ToolUse: ClaudeExecutor.Converters._convert_tool_use_block,
-                ToolCall: ClaudeExecutor.Converters._convert_tool_call_block,
-                System: ClaudeExecutor.Converters._handle_system_block,
-            }
-            
-            for block_type, converter in block_converters.items():
-                if isinstance(block, block_type):
-                    return converter(block)
-            
-            raise ValueError(f"Unknown block type: {type(block)}")
-
-        @staticmethod
-        def _convert_user_block(block: User) -> list[dict[str, Any]]:
-            return [
-                {
-                    "role": "user",
-                    "content": ClaudeExecutor.Converters.content_list_to_anthropic(
-                        block.content
-                    ),
-                }
-            ]
+@lru_cache(maxsize=None)
+def shared_http_client() -> httpx.Client:
+    return anthropic.DefaultHttpxClient(http2=HTTP2_ENABLED, limits=HTTP_LIMITS)
 
-        @staticmethod
-        def _convert_assistant_block(block: Assistant) -> list[dict[str, Any]]:
-            return [
-                {
-                    "role": "assistant",
-                    "content": ClaudeExecutor.Converters.content_list_to_anthropic(
-                        block.content
-                    ),
-                }
-            ]
 
-        @staticmethod
-        def _convert_tool_use_block(block: ToolUse) -> list[dict[str, Any]]:
-            tool_use_msg = ClaudeExecutor.Converters._create_tool_use_message(
-                block.id, block.name, block.arguments
-            )
-            messages = [tool_use_msg]
+@lru_cache(maxsize=None)
+def compressed_http_client() -> httpx.Client:
+    transport = httpx.HTTPTransport(http2=HTTP2_ENABLED, limits=HTTP_LIMITS)
+    return anthropic.DefaultHttpxClient(transport=CompressingTransport(transport))
 
-            if block.result is not None or block.error:
-                result_msg = ClaudeExecutor.Converters._create_tool_result_message(
-                    block.id, block.result, block.error
-                )
-                messages.append(result_msg)
-
-            return messages
-
-        @staticmethod
-        def _convert_tool_call_block(block: ToolCall) -> list[dict[str, Any]]:
-            return [ClaudeExecutor.Converters._create_tool_use_message(
-                block.id, block.name, block.arguments
-            )]
-
-        @staticmethod
-        def _handle_system_block(block: System) -> list[dict[str, Any]]:
-            raise ValueError("System blocks should be handled separately")
-
-        @staticmethod
-        def _create_tool_use_message(
-            tool_id: str, name: str, arguments: dict[str, Any]
-        ) -> dict[str, Any]:
-            return {
-                "role": "assistant",
-                "content": [
-                    {
-                        "type": "tool_use",
-                        "id": tool_id,
-                        "name": name,
-                        "input": arguments,
-                    }
-                ],
-            }
 
-        @staticmethod
-        def _create_tool_result_message(
-            tool_id: str, result: Any, error: Optional[str]
-        ) -> dict[str, Any]:
-            content = ClaudeExecutor.Converters._format_tool_result_content(
-                tool_id, result, error
-            )
-            return {"role": "user", "content": content}
-
-        @staticmethod
-        def _format_tool_result_content(
-            tool_id: str, result: Any, error: Optional[str]
-        ) -> list[dict[str, Any]]:
-            if error:
-                return [
-                    {
-                        "type": "tool_result",
-                        "tool_use_id": tool_id,
-                        "content": error,
-                    }
-                ]
-            elif result is not None:
-                content = (
-                    json.dumps(result) if not isinstance(result, str) else result
-                )
-                return [
-                    {
-                        "type": "tool_result",
-                        "tool_use_id": tool_id,
-                        "content": content,
-                    }
-                ]
-            return []
+def async_http_client() -> httpx.AsyncClient:
+    return anthropic.DefaultAsyncHttpxClient(http2=HTTP2_ENABLED, limits=HTTP_LIMITS)
 
-        @staticmethod
-        def content_list_to_anthropic(content: list) -> list[dict[str, Any]]:
-            content_converters = {
-                Text: lambda item: {"type": "text", "text": item.content},
-                str: lambda item: {"type": "text", "text": item},
-                Image: ClaudeExecutor.Converters._convert_image,
-                Document: lambda item: ClaudeExecutor.Converters._handle_document(),
-            }
-            
-            result = []
-            for item in content:
-                for content_type, converter in content_converters.items():
-                    if isinstance(item, content_type):
-                        result.append(converter(item))
-                        break
-            
-            return result
-
-        @staticmethod
-        def _convert_image(image: Image) -> dict[str, Any]:
-            if image.source.startswith("data:"):
-                return ClaudeExecutor.Converters._convert_data_url_image(image)
-            elif image.source.startswith(("http://", "https://")):
-                return ClaudeExecutor.Converters._convert_url_image(image)
-            else:
-                return ClaudeExecutor.Converters._convert_file_image(image)
-
-        @staticmethod
-        def _convert_data_url_image(image: Image) -> dict[str, Any]:
-            media_type, data = image.source.split(";base64,", 1)
-            media_type = media_type.replace("data:", "")
-            return {
-                "type": "image",
-                "source": {
-                    "type": "base64",
-                    "media_type": media_type,
-                    "data": data,
-                },
-            }
 
-        @staticmethod
-        def _convert_url_image(image: Image) -> dict[str, Any]:
-            image_data = url_to_b64(image.source)
-            return {
-                "type": "image",
-                "source": {
-                    "type": "base64",
-                    "media_type": image_data.content_type,
-                    "data": image_data.base64_data,
-                },
-            }
+def compressed_async_http_client() -> httpx.AsyncClient:
+    transport = httpx.AsyncHTTPTransport(http2=HTTP2_ENABLED, limits=HTTP_LIMITS)
+    return anthropic.DefaultAsyncHttpxClient(
+        transport=AsyncCompressingTransport(transport)
+    )
 
-        @staticmethod
-        def _convert_file_image(image: Image) -> dict[str, Any]:
-            path = Path(image.source)
-            with open(path, "rb") as f:
-                data = base64.b64encode(f.read()).decode("utf-8")
-            return {
-                "type": "image",
-                "source": {
-                    "type": "base64",
-                    "media_type": image.media_type,
-                    "data": data,
-                },
-            }
 
-        @staticmethod
-        def _handle_document() -> None:
-            raise NotImplementedError("Document support not implemented")
-
-        @staticmethod
-        def tool_to_anthropic(tool: Tool) -> dict[str, Any]:
-            schema = ClaudeExecutor.Converters._extract_tool_schema(tool.params)
-            return {
-                "name": tool.name,
-                "description": tool.description,
-                "input_schema": schema,
+def block_to_anthropic_content(block: Block) -> list[dict[str, Any]]:
+    converter = resolve_converter(BLOCK_CONVERTERS, type(block))
+    if converter is None:
+        raise ValueError(f"Unknown block type: {type(block)}")
+    return converter(block)
+
+
+def text_block_to_anthropic(block: Block) -> Optional[dict[str, Any]]:
+    role = TEXT_BLOCK_ROLES.get(type(block))
+    if role is None:
+        return None
+
+    content = []
+    for item in block.content:
+        item_type = type(item)
+        if item_type is str:
+            content.append({"type": "text", "text": item})
+        elif item_type is Text:
+            content.append({"type": "text", "text": item.content})
+        else:
+            return None
+
+    return {"role": role, "content": content}
+
+
+def _convert_user_block(block: User) -> list[dict[str, Any]]:
+    return [{"role": "user", "content": content_list_to_anthropic(block.content)}]
+
+
+def _convert_assistant_block(block: Assistant) -> list[dict[str, Any]]:
+    return [
+        {"role": "assistant", "content": content_list_to_anthropic(block.content)}
+    ]
+
+
+def _convert_tool_use_block(block: ToolUse) -> list[dict[str, Any]]:
+    tool_use = _create_tool_use_message(block.id, block.name, block.arguments)
+    if block.result is None and not block.error:
+        return [tool_use]
+    return [tool_use, _create_tool_result_message(block.id, block.result, block.error)]
+
+
+def _convert_tool_call_block(block: ToolCall) -> list[dict[str, Any]]:
+    return [_create_tool_use_message(block.id, block.name, block.arguments)]
+
+
+def _handle_system_block(block: System) -> list[dict[str, Any]]:
+    raise ValueError("System blocks should be handled separately")
+
+
+def _create_tool_use_message(
+    tool_id: str, name: str, arguments: dict[str, Any]
+) -> dict[str, Any]:
+    return {
+        "role": "assistant",
+        "content": [
+            {
+                "type": "tool_use",
+                "id": tool_id,
+                "name": name,
+                "input": arguments,
+            }
+        ],
+    }
+
+
+def _create_tool_result_message(
+    tool_id: str, result: Any, error: Optional[str]
+) -> dict[str, Any]:
+    content = _format_tool_result_content(tool_id, result, error)
+    return {"role": "user", "content": content}
+
+
+def _format_tool_result_content(
+    tool_id: str, result: Any, error: Optional[str]
+) -> list[dict[str, Any]]:
+    if error:
+        return [
+            {
+                "type": "tool_result",
+                "tool_use_id": tool_id,
+                "content": error,
+            }
+        ]
+    elif result is not None:
+        content = (
+            serialization.dumps(result) if not isinstance(result, str) else result
+        )
+        return [
+            {
+                "type": "tool_result",
+                "tool_use_id": tool_id,
+                "content": content,
             }
+        ]
+    return []
 
-        @staticmethod
-        def _extract_tool_schema(params: Any) -> dict[str, Any]:
-            if not params:
-                return {"type": "object", "properties": {}}
-            
-            if hasattr(params, "model_json_schema"):
-                return params.model_json_schema()
-            elif isinstance(params, dict):
-                return params
+
+def content_list_to_anthropic(content: list) -> list[dict[str, Any]]:
+    if len(content) == 1:
+        item = content[0]
+        item_type = type(item)
+        if item_type is str:
+            return [{"type": "text", "text": item}]
+        if item_type is Text:
+            return [{"type": "text", "text": item.content}]
+
+    result = []
+    for item in content:
+        converter = resolve_converter(CONTENT_CONVERTERS, type(item))
+        if converter is not None:
+            result.append(converter(item))
+
+    return result
+
+
+def _convert_text(item: Text) -> dict[str, Any]:
+    return {"type": "text", "text": item.content}
+
+
+def _convert_str(item: str) -> dict[str, Any]:
+    return {"type": "text", "text": item}
+
+
+def _convert_document(item: Document) -> dict[str, Any]:
+    return _handle_document()
+
+
+def _convert_image(image: Image) -> dict[str, Any]:
+    if image.source.startswith("data:"):
+        return _convert_data_url_image(image)
+    elif image.source.startswith(("http://", "https://")):
+        return _convert_url_image(image)
+    else:
+        return _convert_file_image(image)
+
+
+def _convert_data_url_image(image: Image) -> dict[str, Any]:
+    header, data = image.source.split(";base64,", 1)
+    return {
+        "type": "image",
+        "source": {
+            "type": "base64",
+            "media_type": header.removeprefix("data:"),
+            "data": data,
+        },
+    }
+
+
+def _convert_url_image(image: Image) -> dict[str, Any]:
+    return {"type": "image", "source": {"type": "url", "url": image.source}}
+
+
+def _inline_url_image(item: dict[str, Any]) -> dict[str, Any]:
+    if item.get("type") != "image" or item["source"]["type"] != "url":
+        return item
+    image_data = cached_url_to_b64(item["source"]["url"])
+    return {
+        "type": "image",
+        "source": {
+            "type": "base64",
+            "media_type": image_data.content_type,
+            "data": image_data.base64_data,
+        },
+    }
+
+
+def _convert_file_image(image: Image) -> dict[str, Any]:
+    return {
+        "type": "image",
+        "source": {
+            "type": "base64",
+            "media_type": image.media_type,
+            "data": file_to_b64(image.source),
+        },
+    }
+
+
+def _handle_document() -> None:
+    raise NotImplementedError("Document support not implemented")
+
+
+def tool_to_anthropic(tool: Tool) -> dict[str, Any]:
+    return {
+        "name": tool.name,
+        "description": tool.description,
+        "input_schema": tool.schema,
+    }
+
+
+def build_anthropic_messages(
+    prompt: Prompt,
+) -> tuple[list[dict[str, Any]], Optional[str]]:
+    messages: list[dict[str, Any]] = []
+    append = messages.append
+    system_message = None
+    last_role = None
+    for block in prompt.conversation:
+        if isinstance(block, System):
+            if system_message is None:
+                system_message = block.content
+            continue
+        text_msg = text_block_to_anthropic(block)
+        converted = (
+            [text_msg] if text_msg is not None else block_to_anthropic_content(block)
+        )
+        for msg in converted:
+            if msg["role"] == last_role:
+                messages[-1]["content"].extend(msg["content"])
             else:
-                return {"type": "object", "properties": {}}
-
-        @staticmethod
-        def merge_consecutive_roles(messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
-            if not messages:
-                return []
-
-            merged = []
-            current = messages[0].copy()
-
-            for msg in messages[1:]:
-                if msg["role"] == current["role"]:
-                    current["content"].extend(msg["content"])
-                else:
-                    merged.append(current)
-                    current = msg.copy()
-
-            merged.append(current)
-            return merged
-
-
-    @staticmethod
-    def parse_anthropic_response(response, tools: list[Tool]) -> LLMResponse:
-        text_parts = []
-        tool_calls = []
-
-        for content in response.content:
-            if content.type == "text":
-                text_parts.append(content.text)
-            elif content.type == "tool_use":
-                tool_calls.append(
-                    ToolCall(name=content.name, arguments=content.input, id=content.id)
-                )
+                last_role = msg["role"]
+                append({"role": last_role, "content": list(msg["content"])})
+
+    if prompt.system:
+        system_message = prompt.system
+
+    return messages, system_message
+
+
+def merge_consecutive_roles(messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    merged = []
+    i = 0
+    n = len(messages)
+    while i < n:
+        role = messages[i]["role"]
+        content = list(messages[i]["content"])
+        i += 1
+        while i < n and messages[i]["role"] == role:
+            content.extend(messages[i]["content"])
+            i += 1
+        merged.append({"role": role, "content": content})
+    return merged
+
+
+def system_to_anthropic(system: str, cache: bool) -> str | list[dict[str, Any]]:
+    if not cache:
+        return system
+    return [
+        {
+            "type": "text",
+            "text": system,
+            "cache_control": EPHEMERAL_CACHE_CONTROL,
+        }
+    ]
+
 
-        return LLMResponse(
-            raw_response=response,
-            tools=tools,
-            _text_content=" ".join(text_parts),
-            _tool_calls=tool_calls,
+def tool_choice_to_anthropic(tool_choice: Optional[str]) -> Optional[dict[str, Any]]:
+    if not tool_choice or tool_choice == "auto":
+        return None
+    if tool_choice == "required":
+        return {"type": "any"}
+    if tool_choice == "none":
+        return {"type": "none"}
+    return {"type": "tool", "name": tool_choice}
+
+
+def rows_to_prompt(rows: list[str], system: Optional[str] = None) -> Prompt:
+    marshaled = "\n".join(f"<row id={i}>{row}</row>" for i, row in enumerate(rows))
+    return Prompt(
+        system=system,
+        conversation=[User(marshaled)],
+        tools=[ROWS_TOOL],
+        tool_choice=ROWS_TOOL.name,
+    )
+
+
+def parse_row_outputs(response: LLMResponse, count: int) -> list[Optional[str]]:
+    outputs: list[Optional[str]] = [None] * count
+    tool_call = response.tool_call()
+    if tool_call is None:
+        return outputs
+    for row in tool_call.arguments.get("rows", []):
+        row_id = row.get("id")
+        if isinstance(row_id, int) and 0 <= row_id < count:
+            outputs[row_id] = row.get("output")
+    return outputs
+
+
+def tools_with_cache_control(tools: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    return [*tools[:-1], {**tools[-1], "cache_control": EPHEMERAL_CACHE_CONTROL}]
+
+
+def approx_tokens(text: str) -> int:
+    return len(text) >> 2
+
+
+def _message_tokens(message: dict[str, Any]) -> int:
+    chars = 0
+    for item in message["content"]:
+        text = item.get("text", item.get("content"))
+        if isinstance(text, str):
+            chars += len(text)
+    return chars >> 2
+
+
+def _is_stable(content: list[dict[str, Any]]) -> bool:
+    return not any(
+        item.get("type") == "image" and item["source"].get("type") == "url"
+        for item in content
+    )
+
+
+def add_cache_breakpoints(
+    messages: list[dict[str, Any]],
+    count: int,
+    min_tokens: int = 0,
+    prefix_tokens: int = 0,
+) -> list[dict[str, Any]]:
+    cumulative = []
+    for msg in messages:
+        prefix_tokens += _message_tokens(msg)
+        cumulative.append(prefix_tokens)
+
+    remaining = count
+    for i in range(len(messages) - 1, -1, -1):
+        if remaining <= 0 or cumulative[i] < min_tokens:
+            break
+        msg = messages[i]
+        if msg["role"] == "user" and msg["content"] and _is_stable(msg["content"]):
+            content = msg["content"]
+            content[-1] = {**content[-1], "cache_control": EPHEMERAL_CACHE_CONTROL}
+            remaining -= 1
+    return messages
+
+
+def image_urls(conversation: list[Block]) -> list[str]:
+    return [
+        item.source
+        for block in conversation
+        if isinstance(block, (User, Assistant))
+        for item in block.content
+        if isinstance(item, Image) and item.source.startswith(("http://", "https://"))
+    ]
+
+
+def inline_url_images(messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    return [
+        {**message, "content": [_inline_url_image(item) for item in message["content"]]}
+        if isinstance(message["content"], list)
+        else message
+        for message in messages
+    ]
+
+
+def build_anthropic_kwargs(
+    params: AnthropicParams,
+    messages: list[dict[str, Any]],
+    system_message: Optional[str],
+    tools: Optional[list[dict[str, Any]]],
+    prompt_tool_choice: Optional[str] = None,
+) -> dict[str, Any]:
+    kwargs = {
+        "model": params.model,
+        "max_tokens": params.max_tokens,
+        "messages": messages,
+        "temperature": params.temperature,
+    }
+
+    breakpoints = 0
+    if params.enable_prompt_cache:
+        breakpoints = min(params.cache_breakpoints, MAX_CACHE_BREAKPOINTS)
+
+    prefix_tokens = 0
+    if tools:
+        kwargs["tools"] = tools
+        tool_choice = tool_choice_to_anthropic(prompt_tool_choice)
+        if tool_choice:
+            kwargs["tool_choice"] = tool_choice
+        if breakpoints > 0:
+            prefix_tokens = approx_tokens(serialization.dumps(tools))
+
+    if system_message:
+        prefix_tokens += approx_tokens(system_message)
+        cache_system = breakpoints > 0 and prefix_tokens >= params.cache_min_tokens
+        kwargs["system"] = system_to_anthropic(system_message, cache_system)
+        if cache_system:
+            breakpoints -= 1
+    elif tools and breakpoints > 0 and prefix_tokens >= params.cache_min_tokens:
+        kwargs["tools"] = tools_with_cache_control(tools)
+        breakpoints -= 1
+
+    if breakpoints > 0:
+        add_cache_breakpoints(
+            messages, breakpoints, params.cache_min_tokens, prefix_tokens
         )
 
-    def __init__(self, client=None, params: Optional[AnthropicParams] = None):
-        self.client = client or anthropic.Anthropic()
-        self.params = params or AnthropicParams()
+    return kwargs
+
+
+def parse_anthropic_response(response, tools: list[Tool]) -> LLMResponse:
+    text_parts = []
+    tool_calls = []
+
+    for content in response.content:
+        if content.type == "text":
+            text_parts.append(content.text)
+        elif content.type == "tool_use":
+            tool_calls.append(
+                ToolCall(name=content.name, arguments=content.input, id=content.id)
+            )
+
+    if len(text_parts) == 1:
+        text_content = text_parts[0]
+    else:
+        text_content = " ".join(text_parts)
+
+    return LLMResponse(
+        raw_response=response,
+        tools=tools,
+        _text_content=text_content,
+        _tool_calls=tool_calls,
+    )
+
+
+BLOCK_CONVERTERS = {
+    User: _convert_user_block,
+    Assistant: _convert_assistant_block,
+    ToolUse: _convert_tool_use_block,
+    ToolCall: _convert_tool_call_block,
+    System: _handle_system_block,
+}
+
+CONTENT_CONVERTERS = {
+    Text: _convert_text,
+    str: _convert_str,
+    Image: _convert_image,
+    Document: _convert_document,
+}
+
+TEXT_BLOCK_ROLES = {User: "user", Assistant: "assistant"}
+
+
+class ClaudeExecutor:
+    class Converters:
+        block_to_anthropic_content = staticmethod(block_to_anthropic_content)
+        text_block_to_anthropic = staticmethod(text_block_to_anthropic)
+        content_list_to_anthropic = staticmethod(content_list_to_anthropic)
+        tool_to_anthropic = staticmethod(tool_to_anthropic)
+        merge_consecutive_roles = staticmethod(merge_consecutive_roles)
+        system_to_anthropic = staticmethod(system_to_anthropic)
+        add_cache_breakpoints = staticmethod(add_cache_breakpoints)
+        tools_with_cache_control = staticmethod(tools_with_cache_control)
+        tool_choice_to_anthropic = staticmethod(tool_choice_to_anthropic)
+
+    parse_anthropic_response = staticmethod(parse_anthropic_response)
+
+    def __init__(
+        self,
+        client=None,
+        params: Optional[AnthropicParams] = None,
+        aclient=None,
+        compress_requests: bool = False,
+    ):
+        if client is None:
+            http_client = (
+                compressed_http_client() if compress_requests else shared_http_client()
+            )
+            client = anthropic.Anthropic(http_client=http_client)
+        self.client = client
+        self.aclient = aclient
+        self.compress_requests = compress_requests
+        self.params = params or DEFAULT_PARAMS
+        self._loop_clients: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, anthropic.AsyncAnthropic
+        ] = weakref.WeakKeyDictionary()
 
     def execute(
         self, prompt: Prompt, params: Optional[AnthropicParams] = None
+    ) -> LLMResponse:
+        kwargs = self._build_request(prompt, params or self.params)
+
+        response = self.client.messages.create(**kwargs)  # type: ignore
+
+        return parse_anthropic_response(response, prompt.tools or [])
+
+    def execute_stream(
+        self, prompt: Prompt, params: Optional[AnthropicParams] = None
+    ) -> ResponseStream:
+        kwargs = self._build_request(prompt, params or self.params)
+        return ResponseStream(self._stream_chunks(kwargs, prompt.tools or []))
+
+    def _stream_chunks(
+        self, kwargs: dict[str, Any], tools: list[Tool]
+    ) -> Generator[str, None, LLMResponse]:
+        with self.client.messages.stream(**kwargs) as stream:
+            yield from stream.text_stream
+            return parse_anthropic_response(stream.get_final_message(), tools)
+
+    async def aexecute_stream(
+        self, prompt: Prompt, params: Optional[AnthropicParams] = None
+    ) -> AsyncResponseStream:
+        params = params or self.params
+        if params.inline_image_urls:
+            await aprefetch_urls(image_urls(prompt.conversation))
+        kwargs = self._build_request(prompt, params)
+        return AsyncResponseStream(self._astream_chunks(kwargs, prompt.tools or []))
+
+    async def _astream_chunks(
+        self, kwargs: dict[str, Any], tools: list[Tool]
+    ) -> AsyncGenerator[str | LLMResponse, None]:
+        async with self._async_client().messages.stream(**kwargs) as stream:
+            async for text in stream.text_stream:
+                yield text
+            yield parse_anthropic_response(await stream.get_final_message(), tools)
+
+    async def aexecute(
+        self, prompt: Prompt, params: Optional[AnthropicParams] = None
     ) -> LLMResponse:
         params = params or self.params
+        if params.inline_image_urls:
+            await aprefetch_urls(image_urls(prompt.conversation))
+        kwargs = self._build_request(prompt, params)
 
-        messages = self._build_messages(prompt)
-        system_message = self._extract_system_message(prompt)
-        tools = self._convert_tools(prompt.tools)
+        response = await self._async_client().messages.create(**kwargs)  # type: ignore
 
-        kwargs = self._build_api_kwargs(params, messages, system_message, tools)
+        return parse_anthropic_response(response, prompt.tools or [])
 
-        response = self.client.messages.create(**kwargs)  # type: ignore
+    def execute_many(
+        self,
+        prompts: list[Prompt],
+        params: Optional[AnthropicParams] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> list[LLMResponse]:
+        if not prompts:
+            return []
 
-        return self.parse_anthropic_response(response, prompt.tools or [])
-
-    def _build_messages(self, prompt: Prompt) -> list[dict[str, Any]]:
-        messages = []
-        for block in prompt.conversation:
-            if not isinstance(block, System):
-                msg = self.Converters.block_to_anthropic_content(block)
-                messages.extend(msg)
-        return self.Converters.merge_consecutive_roles(messages)
-
-    def _extract_system_message(self, prompt: Prompt) -> Optional[str]:
-        if prompt.system:
-            return prompt.system
-        
-        for block in prompt.conversation:
-            if isinstance(block, System):
-                return block.content
-        
-        return None
+        pool = ThreadPoolExecutor(max_workers=min(max_concurrency, len(prompts)))
+        try:
+            return list(pool.map(lambda prompt: self.execute(prompt, params), prompts))
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def execute_rows(
+        self,
+        rows: list[str],
+        system: Optional[str] = None,
+        params: Optional[AnthropicParams] = None,
+        batch_size: int = DEFAULT_ROW_BATCH_SIZE,
+    ) -> list[Optional[str]]:
+        batch_size = max(1, min(batch_size, MAX_ROW_BATCH_SIZE))
+        chunks = [rows[i : i + batch_size] for i in range(0, len(rows), batch_size)]
+        responses = self.execute_many(
+            [rows_to_prompt(chunk, system) for chunk in chunks], params
+        )
 
-    def _convert_tools(self, tools: Optional[list[Tool]]) -> Optional[list[dict[str, Any]]]:
-        if not tools:
-            return None
-        return [self.Converters.tool_to_anthropic(tool) for tool in tools]
+        outputs: list[Optional[str]] = []
+        for chunk, response in zip(chunks, responses):
+            outputs.extend(parse_row_outputs(response, len(chunk)))
+        return outputs
+
+    async def aexecute_many(
+        self,
+        prompts: list[Prompt],
+        params: Optional[AnthropicParams] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        return_exceptions: bool = False,
+    ) -> list[LLMResponse | BaseException]:
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run(prompt: Prompt) -> LLMResponse:
+            async with semaphore:
+                return await self.aexecute(prompt, params)
+
+        return await asyncio.gather(
+            *(run(prompt) for prompt in prompts), return_exceptions=return_exceptions
+        )
 
-    def _build_api_kwargs(
-        self, 
-        params: AnthropicParams, 
-        messages: list[dict[str, Any]], 
-        system_message: Optional[str],
-        tools: Optional[list[dict[str, Any]]]
-    ) -> dict[str, Any]:
-        kwargs = {
-            "model": params.model,
-            "max_tokens": params.max_tokens,
-            "messages": messages,
-        }
+    def execute_batch(
+        self,
+        prompts: list[Prompt],
+        params: Optional[AnthropicParams] = None,
+        timeout: Optional[float] = None,
+        poll_interval: float = BATCH_POLL_INITIAL_SECONDS,
+    ) -> list[LLMResponse]:
+        params = params or self.params
+        batches = self.client.messages.batches
 
-        if system_message:
-            kwargs["system"] = system_message
+        batch = batches.create(
+            requests=[
+                {"custom_id": str(i), "params": self._build_request(prompt, params)}
+                for i, prompt in enumerate(prompts)
+            ]
+        )
 
-        if tools:
-            kwargs["tools"] = tools
+        deadline = None if timeout is None else time.monotonic() + timeout
+        delay = poll_interval
+        while batch.processing_status != "ended":
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise TimeoutError(
+                    f"Batch {batch.id} still {batch.processing_status} "
+                    f"after {timeout} seconds"
+                )
+            time.sleep(delay if remaining is None else min(delay, remaining))
+            delay = min(delay * 2, BATCH_POLL_MAX_SECONDS)
+            batch = batches.retrieve(batch.id)
+
+        responses: dict[int, LLMResponse] = {}
+        for entry in batches.results(batch.id):
+            index = int(entry.custom_id)
+            if entry.result.type != "succeeded":
+                raise RuntimeError(
+                    f"Batch request {entry.custom_id} {entry.result.type}"
+                )
+            responses[index] = parse_anthropic_response(
+                entry.result.message, prompts[index].tools or []
+            )
 
-        if hasattr(params, "temperature"):
-            kwargs["temperature"] = params.temperature
+        missing = [str(i) for i in range(len(prompts)) if i not in responses]
+        if missing:
+            raise RuntimeError(
+                f"Batch returned no result for requests {','.join(missing)}"
+            )
+        return [responses[i] for i in range(len(prompts))]
+
+    def _async_client(self):
+        if self.aclient is not None:
+            return self.aclient
+        loop = asyncio.get_running_loop()
+        client = self._loop_clients.get(loop)
+        if client is None:
+            http_client = (
+                compressed_async_http_client()
+                if self.compress_requests
+                else async_http_client()
+            )
+            client = anthropic.AsyncAnthropic(http_client=http_client)
+            self._loop_clients[loop] = client
+        return client
 
-        return kwargs
+    def _build_request(
+        self, prompt: Prompt, params: AnthropicParams
+    ) -> dict[str, Any]:
+        messages, system_message = build_anthropic_messages(prompt)
+        if params.inline_image_urls:
+            prefetch_urls(image_urls(prompt.conversation))
+            messages = inline_url_images(messages)
+        tools = self._convert_tools(prompt.tools)
 
+        return build_anthropic_kwargs(
+            params, messages, system_message, tools, prompt.tool_choice
+        )
 
-# Compatibility layer for existing code
-block_to_anthropic_content = ClaudeExecutor.Converters.block_to_anthropic_content
-content_list_to_anthropic = ClaudeExecutor.Converters.content_list_to_anthropic
-tool_to_anthropic = ClaudeExecutor.Converters.tool_to_anthropic
-merge_consecutive_roles = ClaudeExecutor.Converters.merge_consecutive_roles
-parse_anthropic_response = ClaudeExecutor.parse_anthropic_response
+    def _convert_tools(self, tools: Optional[list[Tool]]) -> Optional[list[dict[str, Any]]]:
+        if not tools:
+            return None
+        return [self.Converters.tool_to_anthropic(tool) for tool in tools]
@@ -0,0 +1,71 @@
+import gzip
+from typing import Any
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MIN_COMPRESS_BYTES = 1024
+
+
+def compress_body(body: bytes) -> tuple[bytes, str]:
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=3).compress(body), "zstd"
+    return gzip.compress(body, compresslevel=6), "gzip"
+
+
+def compress_request(request: Any, body: bytes, min_size: int) -> Any:
+    if len(body) < min_size or "content-encoding" in request.headers:
+        return request
+    compressed, encoding = compress_body(body)
+    headers = request.headers.copy()
+    headers["content-encoding"] = encoding
+    headers["content-length"] = str(len(compressed))
+    return type(request)(
+        request.method,
+        request.url,
+        headers=headers,
+        content=compressed,
+        extensions=request.extensions,
+    )
+
+
+class CompressingTransport:
+    def __init__(self, transport: Any, min_size: int = MIN_COMPRESS_BYTES):
+        self.transport = transport
+        self.min_size = min_size
+
+    def handle_request(self, request: Any) -> Any:
+        request = compress_request(request, request.read(), self.min_size)
+        return self.transport.handle_request(request)
+
+    def close(self) -> None:
+        self.transport.close()
+
+    def __enter__(self) -> "CompressingTransport":
+        self.transport.__enter__()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.transport.__exit__(*args)
+
+
+class AsyncCompressingTransport:
+    def __init__(self, transport: Any, min_size: int = MIN_COMPRESS_BYTES):
+        self.transport = transport
+        self.min_size = min_size
+
+    async def handle_async_request(self, request: Any) -> Any:
+        request = compress_request(request, await request.aread(), self.min_size)
+        return await self.transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+    async def __aenter__(self) -> "AsyncCompressingTransport":
+        await self.transport.__aenter__()
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.transport.__aexit__(*args)
@@ -0,0 +1,19 @@
+from typing import Callable, Optional
+
+
+def resolve_converter(
+    converters: dict[type, Callable], item_type: type
+) -> Optional[Callable]:
+    converter = converters.get(item_type)
+    if converter is not None:
+        return converter
+
+    for base_type, candidate in tuple(converters.items()):
+        if issubclass(item_type, base_type):
+            converter = candidate
+            break
+    else:
+        return None
+
+    converters[item_type] = converter
+    return converter
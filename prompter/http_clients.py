@@ -0,0 +1,6 @@
+import importlib.util
+
+import httpx
+
+HTTP2_ENABLED = importlib.util.find_spec("h2") is not None
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
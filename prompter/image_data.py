@@ -1,8 +1,34 @@
-import base64
+import asyncio
+import binascii
+import mmap
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Optional
 
 import httpx
 
+from prompter.http_clients import HTTP2_ENABLED, HTTP_LIMITS
+
+try:
+    import pybase64
+except ImportError:
+    pybase64 = None
+
+URL_CACHE_TTL_SECONDS = 3600
+URL_CACHE_SIZE = 256
+MAX_PREFETCH_WORKERS = 8
+LARGE_FILE_BYTES = 8 * 1024 * 1024
+ENCODE_CHUNK_BYTES = 3 * 1024 * 1024
+READ_CHUNK_BYTES = 64 * 1024
+FILE_CACHE_BYTES = 64 * 1024 * 1024
+
 
 @dataclass
 class ImageData:
@@ -10,8 +36,216 @@ class ImageData:
     content_type: str
 
 
+@dataclass
+class _CacheEntry:
+    fetched_at: float
+    image_data: ImageData
+    validators: dict[str, str]
+
+
+_url_cache: OrderedDict[str, _CacheEntry] = OrderedDict()
+_url_cache_lock = threading.Lock()
+_file_cache: OrderedDict[tuple[str, int, int], str] = OrderedDict()
+_file_cache_bytes = 0
+_file_cache_lock = threading.Lock()
+_async_clients: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, httpx.AsyncClient
+] = weakref.WeakKeyDictionary()
+
+
+@lru_cache(maxsize=None)
+def http_client() -> httpx.Client:
+    return httpx.Client(
+        http2=HTTP2_ENABLED, limits=HTTP_LIMITS, follow_redirects=True
+    )
+
+
+def async_http_client() -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            http2=HTTP2_ENABLED, limits=HTTP_LIMITS, follow_redirects=True
+        )
+        _async_clients[loop] = client
+    return client
+
+
 def url_to_b64(url: str) -> ImageData:
-    response = httpx.get(url)
+    with http_client().stream("GET", url) as response:
+        response.raise_for_status()
+        return _to_image_data(response, _read_body(response))
+
+
+def _read_body(response: httpx.Response) -> bytearray:
+    body = bytearray()
+    for chunk in response.iter_bytes(READ_CHUNK_BYTES):
+        body += chunk
+    return body
+
+
+async def _aread_body(response: httpx.Response) -> bytearray:
+    body = bytearray()
+    async for chunk in response.aiter_bytes(READ_CHUNK_BYTES):
+        body += chunk
+    return body
+
+
+def _to_image_data(response: httpx.Response, body: bytearray) -> ImageData:
     content_type = response.headers.get("content-type")
-    base64_data = base64.standard_b64encode(response.content).decode("utf-8")
-    return ImageData(base64_data=base64_data, content_type=content_type)
+    return ImageData(base64_data=b64encode(body), content_type=content_type)
+
+
+def b64encode(data: bytes | bytearray | memoryview | mmap.mmap) -> str:
+    if pybase64 is not None:
+        return pybase64.b64encode_as_string(data)
+    return binascii.b2a_base64(data, newline=False).decode("ascii")
+
+
+def cached_url_to_b64(url: str) -> ImageData:
+    image_data = _cache_get(url)
+    if image_data is None:
+        image_data = _fetch(url, _stale_entry(url))
+    return image_data
+
+
+def prefetch_urls(urls: Iterable[str]) -> None:
+    missing = _uncached(urls)
+    if len(missing) < 2:
+        return
+    workers = min(MAX_PREFETCH_WORKERS, len(missing))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda url: _fetch(url, _stale_entry(url)), missing))
+
+
+async def aprefetch_urls(
+    urls: Iterable[str], client: Optional[httpx.AsyncClient] = None
+) -> None:
+    missing = _uncached(urls)
+    if not missing:
+        return
+    client = client or async_http_client()
+    await asyncio.gather(*(_afetch(url, _stale_entry(url), client) for url in missing))
+
+
+def _fetch(url: str, entry: Optional[_CacheEntry]) -> ImageData:
+    headers = _conditional_headers(entry)
+    with http_client().stream("GET", url, headers=headers) as response:
+        if response.status_code == 304 and entry is not None:
+            return _revalidated(url, entry)
+        response.raise_for_status()
+        return _store_response(url, response, _read_body(response))
+
+
+async def _afetch(
+    url: str, entry: Optional[_CacheEntry], client: httpx.AsyncClient
+) -> ImageData:
+    headers = _conditional_headers(entry)
+    async with client.stream("GET", url, headers=headers) as response:
+        if response.status_code == 304 and entry is not None:
+            return _revalidated(url, entry)
+        response.raise_for_status()
+        return _store_response(url, response, await _aread_body(response))
+
+
+def _conditional_headers(entry: Optional[_CacheEntry]) -> dict[str, str]:
+    if entry is None:
+        return {}
+    headers = {}
+    if "etag" in entry.validators:
+        headers["If-None-Match"] = entry.validators["etag"]
+    if "last-modified" in entry.validators:
+        headers["If-Modified-Since"] = entry.validators["last-modified"]
+    return headers
+
+
+def _revalidated(url: str, entry: _CacheEntry) -> ImageData:
+    _cache_put(url, entry.image_data, entry.validators)
+    return entry.image_data
+
+
+def _store_response(url: str, response: httpx.Response, body: bytearray) -> ImageData:
+    image_data = _to_image_data(response, body)
+    validators = {
+        name: response.headers[name]
+        for name in ("etag", "last-modified")
+        if name in response.headers
+    }
+    _cache_put(url, image_data, validators)
+    return image_data
+
+
+def _uncached(urls: Iterable[str]) -> list[str]:
+    return [url for url in dict.fromkeys(urls) if _cache_get(url) is None]
+
+
+def _cache_get(url: str) -> Optional[ImageData]:
+    with _url_cache_lock:
+        entry = _url_cache.get(url)
+        if entry is None:
+            return None
+        if time.monotonic() - entry.fetched_at > URL_CACHE_TTL_SECONDS:
+            return None
+        _url_cache.move_to_end(url)
+        return entry.image_data
+
+
+def _stale_entry(url: str) -> Optional[_CacheEntry]:
+    with _url_cache_lock:
+        return _url_cache.get(url)
+
+
+def _cache_put(url: str, image_data: ImageData, validators: dict[str, str]) -> None:
+    with _url_cache_lock:
+        _url_cache[url] = _CacheEntry(time.monotonic(), image_data, validators)
+        _url_cache.move_to_end(url)
+        while len(_url_cache) > URL_CACHE_SIZE:
+            _url_cache.popitem(last=False)
+
+
+def file_to_b64(path: str | Path) -> str:
+    path = str(path)
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    with _file_cache_lock:
+        encoded = _file_cache.get(key)
+        if encoded is not None:
+            _file_cache.move_to_end(key)
+            return encoded
+    encoded = _encode_file(path)
+    _file_cache_put(key, encoded)
+    return encoded
+
+
+def file_to_data_url(path: str | Path, media_type: str) -> str:
+    return f"data:{media_type};base64,{file_to_b64(path)}"
+
+
+def _file_cache_put(key: tuple[str, int, int], encoded: str) -> None:
+    global _file_cache_bytes
+    if len(encoded) > FILE_CACHE_BYTES:
+        return
+    with _file_cache_lock:
+        previous = _file_cache.pop(key, None)
+        if previous is not None:
+            _file_cache_bytes -= len(previous)
+        _file_cache[key] = encoded
+        _file_cache_bytes += len(encoded)
+        while _file_cache_bytes > FILE_CACHE_BYTES:
+            _, evicted = _file_cache.popitem(last=False)
+            _file_cache_bytes -= len(evicted)
+
+
+def _encode_file(path: str) -> str:
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return ""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if size <= LARGE_FILE_BYTES:
+                return b64encode(mm)
+            with memoryview(mm) as view:
+                return "".join(
+                    b64encode(view[start : start + ENCODE_CHUNK_BYTES])
+                    for start in range(0, size, ENCODE_CHUNK_BYTES)
+                )
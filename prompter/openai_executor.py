@@ -1,12 +1,24 @@
-import base64
-import json
-from dataclasses import dataclass
-from pathlib import Path
-from typing import Any, Optional
-
-from openai import OpenAI
-
-from prompter.image_data import url_to_b64
+import asyncio
+import copy
+import hashlib
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from typing import Any, Generator, Iterable, Iterator, MutableMapping, Optional
+
+import httpx
+import openai
+from openai import AsyncOpenAI, OpenAI
+from openai.types.chat import ChatCompletion
+
+from prompter import serialization
+from prompter.dispatch import resolve_converter
+from prompter.http_clients import HTTP2_ENABLED, HTTP_LIMITS
+from prompter.image_data import file_to_data_url
 from prompter.schemas import (
     Assistant,
     Block,
@@ -14,13 +26,16 @@ from prompter.schemas import (
     Image,
     LLMResponse,
     Prompt,
+    ResponseStream,
     System,
     Text,
     Tool,
     ToolCall,
     ToolUse,
     User,
+    model_json_schema,
 )
+from prompter.semantic_cache import SemanticCache, SemanticProbe
 
 
 @dataclass
@@ -30,216 +45,359 @@ class OpenAIParams:
     temperature: float = 0.0
 
 
-class OpenAIExecutor:
-    class Converters:
-        @staticmethod
-        def block_to_openai_messages(block: Block) -> list[dict[str, Any]]:
-            block_converters = {
-                User: OpenAIExecutor.Converters._convert_user_block,
-                Assistant: OpenAIExecutor.Converters._convert_assistant_block,
-                ToolUse: OpenAIExecutor.Converters._convert_tool_use_block,
-                ToolCall: OpenAIExecutor.Converters._convert_tool_call_block,
-                System: OpenAIExecutor.Converters._convert_system_block,
-            }
-            
-            for block_type, converter in block_converters.items():
-                if isinstance(block, block_type):
-                    return converter(block)
-            
-            raise ValueError(f"Unknown block type: {type(block)}")
-
-        @staticmethod
-        def _convert_user_block(block: User) -> list[dict[str, Any]]:
-            return [OpenAIExecutor.Converters._build_user_message(block)]
-
-        @staticmethod
-        def _convert_assistant_block(block: Assistant) -> list[dict[str, Any]]:
-            content = OpenAIExecutor.Converters._process_assistant_content(block.content)
-            return [{"role": "assistant", "content": content}]
-
-        @staticmethod
-        def _convert_tool_use_block(block: ToolUse) -> list[dict[str, Any]]:
-            tool_call_msg = OpenAIExecutor.Converters._create_tool_call_message(
-                block.id, block.name, block.arguments
-            )
-            messages = [tool_call_msg]
+DEFAULT_MAX_CONCURRENCY = 16
+BATCH_POLL_INITIAL_SECONDS = 1.0
+BATCH_POLL_MAX_SECONDS = 60.0
+BATCH_TERMINAL_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+CHAT_COMPLETIONS_ENDPOINT = "/v1/chat/completions"
+TOOL_CHOICE_MODES = frozenset({"required", "none", "auto"})
+RESPONSE_CACHE_SIZE = 1024
 
-            tool_result = OpenAIExecutor.Converters._create_tool_result(
-                block.id, block.result, block.error
-            )
-            if tool_result:
-                messages.append(tool_result)
-
-            return messages
-
-        @staticmethod
-        def _convert_tool_call_block(block: ToolCall) -> list[dict[str, Any]]:
-            return [OpenAIExecutor.Converters._create_tool_call_message(
-                block.id, block.name, block.arguments
-            )]
-
-        @staticmethod
-        def _convert_system_block(block: System) -> list[dict[str, Any]]:
-            return [{"role": "system", "content": block.content}]
-
-        @staticmethod
-        def _build_user_message(block: User) -> dict[str, Any]:
-            content = OpenAIExecutor.Converters._process_user_content(block.content)
-            return {"role": "user", "content": content}
-
-        @staticmethod
-        def _process_user_content(content: list) -> str | list[dict[str, Any]]:
-            if len(content) == 1:
-                item = content[0]
-                if isinstance(item, str):
-                    return item
-                elif isinstance(item, Text):
-                    return item.content
-            
-            return OpenAIExecutor.Converters.content_list_to_openai(content)
-
-        @staticmethod
-        def _process_assistant_content(content: list) -> str | list[dict[str, Any]]:
-            if len(content) == 1:
-                item = content[0]
-                if isinstance(item, str):
-                    return item
-                elif isinstance(item, Text):
-                    return item.content
-            
-            return OpenAIExecutor.Converters.content_list_to_openai(content)
-
-        @staticmethod
-        def _create_tool_call_message(
-            tool_id: str, name: str, arguments: Any
-        ) -> dict[str, Any]:
-            args_str = (
-                json.dumps(arguments) if isinstance(arguments, dict) else arguments
-            )
-            return {
-                "role": "assistant",
-                "tool_calls": [
-                    {
-                        "id": tool_id,
-                        "type": "function",
-                        "function": {
-                            "name": name,
-                            "arguments": args_str,
-                        },
-                    }
-                ],
-            }
 
-        @staticmethod
-        def _create_tool_result(
-            tool_id: str, result: Any, error: Optional[str]
-        ) -> Optional[dict[str, Any]]:
-            content = OpenAIExecutor.Converters._format_tool_result_content(result, error)
-            if content is not None:
-                return {
-                    "role": "tool",
-                    "tool_call_id": tool_id,
-                    "content": content,
-                }
-            return None
+@lru_cache(maxsize=None)
+def shared_http_client() -> httpx.Client:
+    return openai.DefaultHttpxClient(http2=HTTP2_ENABLED, limits=HTTP_LIMITS)
 
-        @staticmethod
-        def _format_tool_result_content(result: Any, error: Optional[str]) -> Optional[str]:
-            if error:
-                return error
-            elif result is not None:
-                return json.dumps(result) if not isinstance(result, str) else result
-            return None
 
-        @staticmethod
-        def content_list_to_openai(content: list) -> list[dict[str, Any]]:
-            content_converters = {
-                Text: lambda item: {"type": "text", "text": item.content},
-                str: lambda item: {"type": "text", "text": item},
-                Image: OpenAIExecutor.Converters._convert_image,
-                Document: lambda item: OpenAIExecutor.Converters._handle_document(),
-            }
-            
-            result = []
-            for item in content:
-                for content_type, converter in content_converters.items():
-                    if isinstance(item, content_type):
-                        result.append(converter(item))
-                        break
-            
-            return result
-
-        @staticmethod
-        def _convert_image(image: Image) -> dict[str, Any]:
-            if image.source.startswith("data:"):
-                return OpenAIExecutor.Converters._create_image_url_dict(
-                    image.source, image.detail
-                )
-            elif image.source.startswith(("http://", "https://")):
-                return OpenAIExecutor.Converters._create_image_url_dict(
-                    image.source, image.detail
-                )
-            else:
-                data_url = OpenAIExecutor.Converters._file_to_data_url(image)
-                return OpenAIExecutor.Converters._create_image_url_dict(
-                    data_url, image.detail
-                )
+def async_http_client() -> httpx.AsyncClient:
+    return openai.DefaultAsyncHttpxClient(http2=HTTP2_ENABLED, limits=HTTP_LIMITS)
+
+
+def request_cache_key(kwargs: dict[str, Any]) -> str:
+    canonical = serialization.dumps(kwargs, sort_keys=True)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def copy_response(response: LLMResponse, tools: list[Tool]) -> LLMResponse:
+    return replace(
+        response, tools=tools, _tool_calls=copy.deepcopy(response._tool_calls)
+    )
+
+
+class ResponseCache(MutableMapping[str, LLMResponse]):
+    def __init__(self, maxsize: int = RESPONSE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, LLMResponse] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getitem__(self, key: str) -> LLMResponse:
+        with self._lock:
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def __setitem__(self, key: str, response: LLMResponse) -> None:
+        with self._lock:
+            self._entries[key] = response
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def __delitem__(self, key: str) -> None:
+        with self._lock:
+            del self._entries[key]
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            return iter(list(self._entries))
+
+    def __len__(self) -> int:
+        return len(self._entries)
 
-        @staticmethod
-        def _create_image_url_dict(url: str, detail: str) -> dict[str, Any]:
-            return {
-                "type": "image_url",
-                "image_url": {
-                    "url": url,
-                    "detail": detail,
-                },
-            }
 
-        @staticmethod
-        def _file_to_data_url(image: Image) -> str:
-            path = Path(image.source)
-            with open(path, "rb") as f:
-                data = base64.b64encode(f.read()).decode("utf-8")
-            return f"data:{image.media_type};base64,{data}"
-
-        @staticmethod
-        def _handle_document() -> None:
-            raise NotImplementedError("Document support not implemented")
-
-        @staticmethod
-        def tool_to_openai(tool: Tool) -> dict[str, Any]:
-            parameters = OpenAIExecutor.Converters._extract_tool_parameters(tool.params)
-            return {
+@lru_cache(maxsize=256)
+def function_tool_choice(name: str) -> dict[str, Any]:
+    return {"type": "function", "function": {"name": name}}
+
+
+@lru_cache(maxsize=128)
+def json_schema_response_format(model: type) -> dict[str, Any]:
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": model.__name__,
+            "schema": model_json_schema(model),
+            "strict": True,
+        },
+    }
+
+
+def block_to_openai_messages(block: Block) -> list[dict[str, Any]]:
+    converter = resolve_converter(BLOCK_CONVERTERS, type(block))
+    if converter is None:
+        raise ValueError(f"Unknown block type: {type(block)}")
+    return converter(block)
+
+
+def _convert_user_block(block: User) -> list[dict[str, Any]]:
+    return [_build_user_message(block)]
+
+
+def _convert_assistant_block(block: Assistant) -> list[dict[str, Any]]:
+    return [{"role": "assistant", "content": _process_role_content(block.content)}]
+
+
+def _convert_tool_use_block(block: ToolUse) -> list[dict[str, Any]]:
+    tool_call_msg = _create_tool_call_message(block.id, block.name, block.arguments)
+    tool_result = _create_tool_result(block.id, block.result, block.error)
+    if tool_result:
+        return [tool_call_msg, tool_result]
+    return [tool_call_msg]
+
+
+def _convert_tool_call_block(block: ToolCall) -> list[dict[str, Any]]:
+    return [_create_tool_call_message(block.id, block.name, block.arguments)]
+
+
+def _convert_system_block(block: System) -> list[dict[str, Any]]:
+    return [{"role": "system", "content": block.content}]
+
+
+def _build_user_message(block: User) -> dict[str, Any]:
+    return {"role": "user", "content": _process_role_content(block.content)}
+
+
+def _process_role_content(content: list) -> str | list[dict[str, Any]]:
+    if len(content) == 1:
+        item = content[0]
+        item_type = type(item)
+        if item_type is str:
+            return item
+        if item_type is Text:
+            return item.content
+
+    return content_list_to_openai(content)
+
+
+def _create_tool_call_message(
+    tool_id: str, name: str, arguments: Any
+) -> dict[str, Any]:
+    return {
+        "role": "assistant",
+        "tool_calls": [
+            {
+                "id": tool_id,
                 "type": "function",
                 "function": {
-                    "name": tool.name,
-                    "description": tool.description,
-                    "parameters": parameters,
+                    "name": name,
+                    "arguments": (
+                        serialization.dumps(arguments)
+                        if isinstance(arguments, dict)
+                        else arguments
+                    ),
                 },
             }
+        ],
+    }
+
+
+def _create_tool_result(
+    tool_id: str, result: Any, error: Optional[str]
+) -> Optional[dict[str, Any]]:
+    content = _format_tool_result_content(result, error)
+    if content is not None:
+        return {
+            "role": "tool",
+            "tool_call_id": tool_id,
+            "content": content,
+        }
+    return None
+
+
+def _format_tool_result_content(result: Any, error: Optional[str]) -> Optional[str]:
+    if error:
+        return error
+    elif result is not None:
+        return serialization.dumps(result) if not isinstance(result, str) else result
+    return None
+
+
+def content_list_to_openai(content: list) -> list[dict[str, Any]]:
+    result = []
+    for item in content:
+        converter = resolve_converter(CONTENT_CONVERTERS, type(item))
+        if converter is not None:
+            result.append(converter(item))
+    return result
+
+
+def _convert_text(item: Text) -> dict[str, Any]:
+    return {"type": "text", "text": item.content}
 
-        @staticmethod
-        def _extract_tool_parameters(params: Any) -> dict[str, Any]:
-            if not params:
-                return {"type": "object", "properties": {}}
-            
-            if hasattr(params, "model_json_schema"):
-                return params.model_json_schema()
-            elif isinstance(params, dict):
-                return params
-            else:
-                return {"type": "object", "properties": {}}
-
-        @staticmethod
-        def flatten_messages(messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
-            flattened = []
-            for msg in messages:
-                if isinstance(msg, list):
-                    flattened.extend(msg)
-                else:
-                    flattened.append(msg)
-            return flattened
 
+def _convert_str(item: str) -> dict[str, Any]:
+    return {"type": "text", "text": item}
+
+
+def _convert_document(item: Document) -> None:
+    return _handle_document()
+
+
+def _convert_image(image: Image) -> dict[str, Any]:
+    if image.source.startswith("data:"):
+        return _create_image_url_dict(image.source, image.detail)
+    elif image.source.startswith(("http://", "https://")):
+        return _create_image_url_dict(image.source, image.detail)
+    else:
+        return _create_image_url_dict(_file_to_data_url(image), image.detail)
+
+
+def _create_image_url_dict(url: str, detail: str) -> dict[str, Any]:
+    return {
+        "type": "image_url",
+        "image_url": {
+            "url": url,
+            "detail": detail,
+        },
+    }
+
+
+def _file_to_data_url(image: Image) -> str:
+    return file_to_data_url(image.source, image.media_type)
+
+
+def _handle_document() -> None:
+    raise NotImplementedError("Document support not implemented")
+
+
+def tool_to_openai(tool: Tool) -> dict[str, Any]:
+    return {
+        "type": "function",
+        "function": {
+            "name": tool.name,
+            "description": tool.description,
+            "parameters": tool.schema,
+        },
+    }
+
+
+def flatten_messages(messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    flattened = []
+    for msg in messages:
+        if isinstance(msg, list):
+            flattened.extend(msg)
+        else:
+            flattened.append(msg)
+    return flattened
+
+
+def build_openai_messages(prompt: Prompt) -> list[dict[str, Any]]:
+    messages: list[dict[str, Any]] = []
+    extend = messages.extend
+    has_system = False
+
+    for block in prompt.conversation:
+        if isinstance(block, System):
+            has_system = True
+        extend(block_to_openai_messages(block))
+
+    if prompt.system and not has_system:
+        messages.insert(0, {"role": "system", "content": prompt.system})
+
+    return messages
+
+
+def parse_batch_output(output: str, prompts: list[Prompt]) -> list[LLMResponse]:
+    responses: dict[int, LLMResponse] = {}
+    for line in output.splitlines():
+        if not line:
+            continue
+        entry = serialization.loads(line)
+        response = entry.get("response") or {}
+        if entry.get("error") or response.get("status_code") != 200:
+            error = entry.get("error") or (response.get("body") or {}).get("error")
+            raise RuntimeError(f"Batch request {entry['custom_id']} failed: {error}")
+        index = int(entry["custom_id"])
+        responses[index] = OpenAIExecutor.parse_openai_response(
+            ChatCompletion.model_validate(response["body"]),
+            prompts[index].tools or [],
+        )
+
+    missing = [str(i) for i in range(len(prompts)) if i not in responses]
+    if missing:
+        raise RuntimeError(f"Batch returned no result for requests {','.join(missing)}")
+    return [responses[i] for i in range(len(prompts))]
+
+
+def assemble_openai_stream(
+    chunks: Iterable[Any], tools: list[Tool]
+) -> Generator[str, None, LLMResponse]:
+    text_parts: list[str] = []
+    calls: dict[int, dict[str, Any]] = {}
+    chunk = None
+    for chunk in chunks:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+        if delta.content:
+            text_parts.append(delta.content)
+            yield delta.content
+        for tc in delta.tool_calls or ():
+            call = calls.setdefault(tc.index, {"id": None, "name": "", "arguments": []})
+            if tc.id:
+                call["id"] = tc.id
+            if tc.function is not None:
+                if tc.function.name:
+                    call["name"] += tc.function.name
+                if tc.function.arguments:
+                    call["arguments"].append(tc.function.arguments)
+
+    return LLMResponse(
+        raw_response=chunk,
+        tools=tools,
+        _text_content="".join(text_parts),
+        _tool_calls=[streamed_tool_call(calls[i]) for i in sorted(calls)],
+    )
+
+
+def streamed_tool_call(call: dict[str, Any]) -> ToolCall:
+    raw_arguments = "".join(call["arguments"])
+    return ToolCall(
+        name=call["name"],
+        arguments=OpenAIExecutor._parse_tool_arguments(raw_arguments),
+        id=call["id"],
+        raw_arguments=raw_arguments,
+    )
+
+
+BLOCK_CONVERTERS = {
+    User: _convert_user_block,
+    Assistant: _convert_assistant_block,
+    ToolUse: _convert_tool_use_block,
+    ToolCall: _convert_tool_call_block,
+    System: _convert_system_block,
+}
+
+CONTENT_CONVERTERS = {
+    Text: _convert_text,
+    str: _convert_str,
+    Image: _convert_image,
+    Document: _convert_document,
+}
+
+
+class OpenAIExecutor:
+    class Converters:
+        block_to_openai_messages = staticmethod(block_to_openai_messages)
+        _convert_user_block = staticmethod(_convert_user_block)
+        _convert_assistant_block = staticmethod(_convert_assistant_block)
+        _convert_tool_use_block = staticmethod(_convert_tool_use_block)
+        _convert_tool_call_block = staticmethod(_convert_tool_call_block)
+        _convert_system_block = staticmethod(_convert_system_block)
+        _build_user_message = staticmethod(_build_user_message)
+        _process_role_content = staticmethod(_process_role_content)
+        _create_tool_call_message = staticmethod(_create_tool_call_message)
+        _create_tool_result = staticmethod(_create_tool_result)
+        _format_tool_result_content = staticmethod(_format_tool_result_content)
+        content_list_to_openai = staticmethod(content_list_to_openai)
+        _convert_text = staticmethod(_convert_text)
+        _convert_str = staticmethod(_convert_str)
+        _convert_document = staticmethod(_convert_document)
+        _convert_image = staticmethod(_convert_image)
+        _create_image_url_dict = staticmethod(_create_image_url_dict)
+        _file_to_data_url = staticmethod(_file_to_data_url)
+        _handle_document = staticmethod(_handle_document)
+        tool_to_openai = staticmethod(tool_to_openai)
+        flatten_messages = staticmethod(flatten_messages)
 
     @staticmethod
     def parse_openai_response(response, tools: list[Tool]) -> LLMResponse:
@@ -261,12 +419,15 @@ class OpenAIExecutor:
         tool_calls = []
         if hasattr(message, "tool_calls") and message.tool_calls:
             for tc in message.tool_calls:
-                arguments = OpenAIExecutor._parse_tool_arguments(tc.function.arguments)
+                raw_arguments = tc.function.arguments
                 tool_calls.append(
                     ToolCall(
                         name=tc.function.name,
-                        arguments=arguments,
+                        arguments=OpenAIExecutor._parse_tool_arguments(raw_arguments),
                         id=tc.id,
+                        raw_arguments=(
+                            raw_arguments if isinstance(raw_arguments, str) else None
+                        ),
                     )
                 )
         return tool_calls
@@ -275,40 +436,233 @@ class OpenAIExecutor:
     def _parse_tool_arguments(arguments: Any) -> Any:
         if isinstance(arguments, str):
             try:
-                return json.loads(arguments)
-            except json.JSONDecodeError:
+                return serialization.loads(arguments)
+            except ValueError:
                 return arguments
         return arguments
 
-    def __init__(self, client=None, params: Optional[OpenAIParams] = None):
-        self.client = client or OpenAI()
+    def __init__(
+        self,
+        client=None,
+        params: Optional[OpenAIParams] = None,
+        aclient=None,
+        cache: Optional[MutableMapping[str, LLMResponse]] = None,
+        semantic_cache: Optional[SemanticCache] = None,
+    ):
+        self.client = client or OpenAI(http_client=shared_http_client())
+        self.aclient = aclient
         self.params = params or OpenAIParams()
+        self.cache = cache
+        self.semantic_cache = semantic_cache
+        self._loop_clients: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, AsyncOpenAI
+        ] = weakref.WeakKeyDictionary()
 
     def execute(
         self, prompt: Prompt, params: Optional[OpenAIParams] = None
     ) -> LLMResponse:
         params = params or self.params
 
-        messages = self._build_messages(prompt)
+        messages = build_openai_messages(prompt)
         kwargs = self._build_api_kwargs(params, messages, prompt)
 
+        key = self._cache_key(params, kwargs)
+        cached = self._cached(key, prompt)
+        if cached is not None:
+            return cached
+
+        probe = self._semantic_probe(params, prompt, kwargs)
+        if probe is not None and probe.response is not None:
+            self._store(key, probe.response)
+            return copy_response(probe.response, prompt.tools or [])
+
         response = self.client.chat.completions.create(**kwargs)
 
-        return self.parse_openai_response(response, prompt.tools or [])
+        parsed = self.parse_openai_response(response, prompt.tools or [])
+        self._semantic_store(probe, parsed)
+        self._store(key, parsed)
+        return parsed
 
-    def _build_messages(self, prompt: Prompt) -> list[dict[str, Any]]:
-        messages = []
-        
-        for block in prompt.conversation:
-            messages.extend(self.Converters.block_to_openai_messages(block))
+    async def aexecute(
+        self, prompt: Prompt, params: Optional[OpenAIParams] = None
+    ) -> LLMResponse:
+        params = params or self.params
+
+        messages = build_openai_messages(prompt)
+        kwargs = self._build_api_kwargs(params, messages, prompt)
+
+        key = self._cache_key(params, kwargs)
+        cached = self._cached(key, prompt)
+        if cached is not None:
+            return cached
+
+        probe = await asyncio.to_thread(self._semantic_probe, params, prompt, kwargs)
+        if probe is not None and probe.response is not None:
+            self._store(key, probe.response)
+            return copy_response(probe.response, prompt.tools or [])
+
+        response = await self._async_client().chat.completions.create(**kwargs)
+
+        parsed = self.parse_openai_response(response, prompt.tools or [])
+        self._semantic_store(probe, parsed)
+        self._store(key, parsed)
+        return parsed
+
+    def execute_stream(
+        self, prompt: Prompt, params: Optional[OpenAIParams] = None
+    ) -> ResponseStream:
+        params = params or self.params
+        kwargs = self._build_api_kwargs(params, build_openai_messages(prompt), prompt)
+        return ResponseStream(self._stream_chunks(kwargs, prompt.tools or []))
+
+    def _stream_chunks(
+        self, kwargs: dict[str, Any], tools: list[Tool]
+    ) -> Generator[str, None, LLMResponse]:
+        with self.client.chat.completions.create(**kwargs, stream=True) as stream:
+            return (yield from assemble_openai_stream(stream, tools))
+
+    def _cache_key(self, params: OpenAIParams, kwargs: dict[str, Any]) -> Optional[str]:
+        if self.cache is None or params.temperature != 0:
+            return None
+        return request_cache_key(kwargs)
+
+    def _cached(self, key: Optional[str], prompt: Prompt) -> Optional[LLMResponse]:
+        if key is None or self.cache is None:
+            return None
+        response = self.cache.get(key)
+        if response is None:
+            return None
+        return copy_response(response, prompt.tools or [])
 
-        if prompt.system and not self._has_system_message(messages):
-            messages.insert(0, {"role": "system", "content": prompt.system})
+    def _store(self, key: Optional[str], response: LLMResponse) -> None:
+        if key is not None and self.cache is not None:
+            self.cache[key] = copy_response(response, response.tools)
 
-        return self.Converters.flatten_messages(messages)
+    def _semantic_probe(
+        self, params: OpenAIParams, prompt: Prompt, kwargs: dict[str, Any]
+    ) -> Optional[SemanticProbe]:
+        if self.semantic_cache is None or params.temperature != 0:
+            return None
+        scope = request_cache_key({k: v for k, v in kwargs.items() if k != "messages"})
+        return self.semantic_cache.probe(prompt, scope)
+
+    def _semantic_store(
+        self, probe: Optional[SemanticProbe], response: LLMResponse
+    ) -> None:
+        if probe is not None and self.semantic_cache is not None:
+            self.semantic_cache.add(probe, copy_response(response, response.tools))
+
+    def execute_many(
+        self,
+        prompts: list[Prompt],
+        params: Optional[OpenAIParams] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> list[LLMResponse]:
+        if not prompts:
+            return []
+
+        pool = ThreadPoolExecutor(max_workers=min(max_concurrency, len(prompts)))
+        try:
+            return list(pool.map(lambda prompt: self.execute(prompt, params), prompts))
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    async def aexecute_many(
+        self,
+        prompts: list[Prompt],
+        params: Optional[OpenAIParams] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        return_exceptions: bool = False,
+    ) -> list[LLMResponse | BaseException]:
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run(prompt: Prompt) -> LLMResponse:
+            async with semaphore:
+                return await self.aexecute(prompt, params)
+
+        return await asyncio.gather(
+            *(run(prompt) for prompt in prompts), return_exceptions=return_exceptions
+        )
+
+    def execute_batch(
+        self,
+        prompts: list[Prompt],
+        params: Optional[OpenAIParams] = None,
+        timeout: Optional[float] = None,
+        poll_interval: float = BATCH_POLL_INITIAL_SECONDS,
+    ) -> list[LLMResponse]:
+        return self.batch_results(
+            self.submit_batch(prompts, params), prompts, timeout, poll_interval
+        )
 
-    def _has_system_message(self, messages: list[dict[str, Any]]) -> bool:
-        return any(msg.get("role") == "system" for msg in messages)
+    def submit_batch(
+        self,
+        prompts: list[Prompt],
+        params: Optional[OpenAIParams] = None,
+        completion_window: str = "24h",
+    ) -> str:
+        params = params or self.params
+        lines = [
+            serialization.dumps(
+                {
+                    "custom_id": str(i),
+                    "method": "POST",
+                    "url": CHAT_COMPLETIONS_ENDPOINT,
+                    "body": self._build_api_kwargs(
+                        params, build_openai_messages(prompt), prompt
+                    ),
+                }
+            )
+            for i, prompt in enumerate(prompts)
+        ]
+        input_file = self.client.files.create(
+            file=("batch.jsonl", "\n".join(lines).encode()), purpose="batch"
+        )
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=CHAT_COMPLETIONS_ENDPOINT,
+            completion_window=completion_window,
+        )
+        return batch.id
+
+    def batch_results(
+        self,
+        batch_id: str,
+        prompts: list[Prompt],
+        timeout: Optional[float] = None,
+        poll_interval: float = BATCH_POLL_INITIAL_SECONDS,
+    ) -> list[LLMResponse]:
+        batch = self.client.batches.retrieve(batch_id)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        delay = poll_interval
+        while batch.status not in BATCH_TERMINAL_STATUSES:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise TimeoutError(
+                    f"Batch {batch_id} still {batch.status} after {timeout} seconds"
+                )
+            time.sleep(delay if remaining is None else min(delay, remaining))
+            delay = min(delay * 2, BATCH_POLL_MAX_SECONDS)
+            batch = self.client.batches.retrieve(batch_id)
+
+        if batch.status != "completed":
+            raise RuntimeError(f"Batch {batch_id} {batch.status}")
+
+        files = [batch.error_file_id, batch.output_file_id]
+        lines = [
+            self.client.files.content(file_id).text for file_id in files if file_id
+        ]
+        return parse_batch_output("\n".join(lines), prompts)
+
+    def _async_client(self):
+        if self.aclient is not None:
+            return self.aclient
+        loop = asyncio.get_running_loop()
+        client = self._loop_clients.get(loop)
+        if client is None:
+            client = AsyncOpenAI(http_client=async_http_client())
+            self._loop_clients[loop] = client
+        return client
 
     def _build_api_kwargs(
         self, 
@@ -339,13 +693,10 @@ class OpenAIExecutor:
         return [self.Converters.tool_to_openai(tool) for tool in tools]
 
     def _format_tool_choice(self, tool_choice: Optional[str]) -> Optional[Any]:
-        if tool_choice in ["required", "none", "auto"]:
+        if tool_choice in TOOL_CHOICE_MODES:
             return tool_choice
         elif isinstance(tool_choice, str):
-            return {
-                "type": "function",
-                "function": {"name": tool_choice},
-            }
+            return function_tool_choice(tool_choice)
         return None
 
     def _format_response_format(self, response_format: Any) -> Optional[dict[str, Any]]:
@@ -353,21 +704,10 @@ class OpenAIExecutor:
             return None
         
         if hasattr(response_format, "model_json_schema"):
-            return {
-                "type": "json_schema",
-                "json_schema": {
-                    "name": response_format.__name__,
-                    "schema": response_format.model_json_schema(),
-                    "strict": True,
-                },
-            }
+            return json_schema_response_format(response_format)
         else:
             return {"type": "json_object"}
 
 
 # Compatibility layer for existing code
-block_to_openai_messages = OpenAIExecutor.Converters.block_to_openai_messages
-content_list_to_openai = OpenAIExecutor.Converters.content_list_to_openai
-tool_to_openai = OpenAIExecutor.Converters.tool_to_openai
-flatten_messages = OpenAIExecutor.Converters.flatten_messages
 parse_openai_response = OpenAIExecutor.parse_openai_response
@@ -1,17 +1,27 @@
-from dataclasses import dataclass
+import secrets
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Literal, Optional, Type
-from uuid import uuid4
+from typing import (
+    Any,
+    AsyncGenerator,
+    AsyncIterator,
+    Generator,
+    Iterator,
+    Literal,
+    Optional,
+    Type,
+)
 
 from pydantic import BaseModel
 
 
-@dataclass
+@dataclass(slots=True)
 class Text:
     content: str
 
 
-@dataclass
+@dataclass(slots=True)
 class Image:
     source: str
     media_type: str = "image/jpeg"
@@ -35,7 +45,7 @@ class Image:
         return cls(source=f"data:{media_type};base64,{data}", media_type=media_type)
 
 
-@dataclass
+@dataclass(slots=True)
 class Document:
     source: str
     doc_type: str
@@ -55,7 +65,7 @@ class Document:
         return cls(source=url, doc_type="url", cache=cache)
 
 
-@dataclass
+@dataclass(slots=True)
 class User:
     content: list[str | Text | Image | Document]
 
@@ -68,7 +78,7 @@ class User:
                 self.content.append(item)
 
 
-@dataclass
+@dataclass(slots=True)
 class Assistant:
     content: list[str | Text | Image | Document]
 
@@ -81,20 +91,25 @@ class Assistant:
                 self.content.append(item)
 
 
-@dataclass
+@dataclass(slots=True)
 class System:
     content: str
 
 
-@dataclass
+def new_tool_id() -> str:
+    return secrets.token_hex(16)
+
+
+@dataclass(slots=True)
 class ToolCall:
     name: str
     arguments: dict[str, Any]
     id: str | None = None
+    raw_arguments: str | None = field(default=None, repr=False, compare=False)
 
     def __post_init__(self):
         if not self.id:
-            self.id = str(uuid4())
+            self.id = new_tool_id()
 
 
 # @dataclass
@@ -104,7 +119,7 @@ class ToolCall:
 #     error: str | None = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ToolUse:
     name: str
     arguments: Any
@@ -114,7 +129,12 @@ class ToolUse:
 
     def __post_init__(self):
         if not self.id:
-            self.id = str(uuid4())
+            self.id = new_tool_id()
+
+
+@lru_cache(maxsize=256)
+def model_json_schema(model: Type[BaseModel]) -> dict[str, Any]:
+    return model.model_json_schema()
 
 
 @dataclass
@@ -128,6 +148,16 @@ class Tool:
         self.description = description
         self.params = params
 
+    @property
+    def schema(self) -> dict[str, Any]:
+        if not self.params:
+            return {"type": "object", "properties": {}}
+        if hasattr(self.params, "model_json_schema"):
+            return model_json_schema(self.params)
+        if isinstance(self.params, dict):
+            return self.params
+        return {"type": "object", "properties": {}}
+
     def validate_arguments(self, arguments: dict[str, Any]) -> dict[str, Any]:
         if isinstance(self.params, type) and issubclass(self.params, BaseModel):
             return self.params(**arguments).model_dump()
@@ -137,8 +167,15 @@ class Tool:
 Block = Text | Image | Document | User | Assistant | System | ToolCall | ToolUse
 
 
-@dataclass
+@dataclass(slots=True)
 class Prompt:
+    conversation: list[Block] = field(default_factory=list)
+    system: str | None = None
+    tools: list[Tool] = field(default_factory=list)
+    response_format: Type[BaseModel] | None = None
+    tool_choice: Literal["auto", "none", "required"] | str = "auto"
+    extra: dict[str, Any] = field(default_factory=dict)
+
     def __init__(
         self,
         conversation: Optional[list[Block]] = None,
@@ -190,17 +227,17 @@ class Prompt:
         return cls(**data)
 
 
-@dataclass
+@dataclass(slots=True)
 class Message:
     content: str
 
 
-@dataclass
+@dataclass(slots=True)
 class TextMessage:
     content: str
 
 
-@dataclass
+@dataclass(slots=True)
 class LLMResponse:
     raw_response: Any
     tools: list[Tool]
@@ -224,3 +261,39 @@ class LLMResponse:
 
     def text_messages(self) -> list[TextMessage]:
         return [TextMessage(content=self._text_content)] if self._text_content else []
+
+
+class ResponseStream:
+    def __init__(self, chunks: Generator[str, None, LLMResponse]):
+        self._chunks = chunks
+        self.final_response: Optional[LLMResponse] = None
+
+    def __iter__(self) -> Iterator[str]:
+        response = yield from self._chunks
+        if response is not None:
+            self.final_response = response
+
+    def response(self) -> LLMResponse:
+        if self.final_response is None:
+            for _ in self:
+                pass
+        return self.final_response  # type: ignore
+
+
+class AsyncResponseStream:
+    def __init__(self, chunks: AsyncGenerator[str | LLMResponse, None]):
+        self._chunks = chunks
+        self.final_response: Optional[LLMResponse] = None
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        async for chunk in self._chunks:
+            if isinstance(chunk, LLMResponse):
+                self.final_response = chunk
+            else:
+                yield chunk
+
+    async def response(self) -> LLMResponse:
+        if self.final_response is None:
+            async for _ in self:
+                pass
+        return self.final_response  # type: ignore
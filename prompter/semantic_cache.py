@@ -0,0 +1,131 @@
+import math
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, Sequence
+
+from prompter.schemas import LLMResponse, Prompt, Text, User
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+DEFAULT_SIMILARITY_THRESHOLD = 0.95
+EMBEDDING_MODEL = "text-embedding-3-small"
+GROWTH_ROWS = 256
+SEMANTIC_CACHE_SIZE = 4096
+
+Embedder = Callable[[str], Sequence[float]]
+
+
+def openai_embedder(client: Any, model: str = EMBEDDING_MODEL) -> Embedder:
+    def embed(text: str) -> Sequence[float]:
+        return client.embeddings.create(model=model, input=text).data[0].embedding
+
+    return embed
+
+
+def prompt_cache_text(prompt: Prompt) -> Optional[str]:
+    if len(prompt.conversation) != 1:
+        return None
+    block = prompt.conversation[0]
+    if type(block) is not User or any(type(item) is not Text for item in block.content):
+        return None
+    user_text = "".join(item.content for item in block.content)
+    return f"{prompt.system or ''}\n{user_text}"
+
+
+def normalize(vector: Sequence[float]) -> Any:
+    if numpy is not None:
+        array = numpy.asarray(vector, dtype=numpy.float32)
+        norm = numpy.linalg.norm(array)
+        return array / norm if norm else array
+    norm = math.sqrt(sum(value * value for value in vector))
+    return tuple(value / norm for value in vector) if norm else tuple(vector)
+
+
+@dataclass
+class SemanticProbe:
+    scope: str
+    vector: Any
+    response: Optional[LLMResponse]
+
+
+class _Index:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.responses: list[LLMResponse] = []
+        self.vectors: Any = None
+        self._next = 0
+
+    def search(self, vector: Any) -> tuple[float, Optional[LLMResponse]]:
+        count = len(self.responses)
+        if count == 0:
+            return -1.0, None
+        if numpy is not None:
+            scores = self.vectors[:count] @ vector
+            best = int(numpy.argmax(scores))
+            return float(scores[best]), self.responses[best]
+        scores = [sum(a * b for a, b in zip(row, vector)) for row in self.vectors]
+        best = max(range(count), key=scores.__getitem__)
+        return scores[best], self.responses[best]
+
+    def add(self, vector: Any, response: LLMResponse) -> None:
+        slot = self._next
+        self._next = (slot + 1) % self.maxsize
+        if slot == len(self.responses):
+            self.responses.append(response)
+        else:
+            self.responses[slot] = response
+        if numpy is None:
+            if self.vectors is None:
+                self.vectors = []
+            if slot == len(self.vectors):
+                self.vectors.append(vector)
+            else:
+                self.vectors[slot] = vector
+            return
+        if self.vectors is None or slot == len(self.vectors):
+            rows = min(GROWTH_ROWS, self.maxsize - slot)
+            grown = numpy.empty((slot + rows, len(vector)), numpy.float32)
+            if self.vectors is not None:
+                grown[:slot] = self.vectors
+            self.vectors = grown
+        self.vectors[slot] = vector
+
+
+class SemanticCache:
+    def __init__(
+        self,
+        embed: Embedder,
+        threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+        maxsize: int = SEMANTIC_CACHE_SIZE,
+    ):
+        self.embed = embed
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self._indexes: dict[str, _Index] = {}
+        self._lock = threading.Lock()
+
+    def probe(self, prompt: Prompt, scope: str) -> Optional[SemanticProbe]:
+        text = prompt_cache_text(prompt)
+        if text is None:
+            return None
+        vector = normalize(self.embed(text))
+        with self._lock:
+            index = self._indexes.get(scope)
+            score, response = index.search(vector) if index else (-1.0, None)
+        if score < self.threshold:
+            response = None
+        return SemanticProbe(scope, vector, response)
+
+    def add(self, probe: SemanticProbe, response: LLMResponse) -> None:
+        with self._lock:
+            index = self._indexes.get(probe.scope)
+            if index is None:
+                index = self._indexes[probe.scope] = _Index(self.maxsize)
+            index.add(probe.vector, response)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(index.responses) for index in self._indexes.values())
@@ -0,0 +1,64 @@
+import dataclasses
+import datetime
+import enum
+import json
+import re
+import uuid
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+LONG_NUMBER = re.compile(r"\d{19}")
+LONG_NUMBER_BYTES = re.compile(rb"\d{19}")
+
+
+def encode_default(value: Any) -> Any:
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any, sort_keys: bool = False) -> str:
+    if orjson is not None:
+        option = (
+            orjson.OPT_NON_STR_KEYS
+            | orjson.OPT_PASSTHROUGH_DATACLASS
+            | orjson.OPT_PASSTHROUGH_DATETIME
+        )
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(value, default=encode_default, option=option).decode()
+        except TypeError:
+            pass
+    return json.dumps(
+        value,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        sort_keys=sort_keys,
+        default=encode_default,
+    )
+
+
+def loads(value: str | bytes) -> Any:
+    if orjson is not None and not _has_long_number(value):
+        try:
+            return orjson.loads(value)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(value)
+
+
+def _has_long_number(value: str | bytes) -> bool:
+    if isinstance(value, str):
+        return LONG_NUMBER.search(value) is not None
+    return LONG_NUMBER_BYTES.search(value) is not None
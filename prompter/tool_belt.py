@@ -28,6 +28,8 @@ class ToolBelt:
             return tool_call.arguments or {}
 
         if isinstance(tool.params, type) and issubclass(tool.params, BaseModel):
+            if tool_call.raw_arguments is not None:
+                return tool.params.model_validate_json(tool_call.raw_arguments)
             return tool.params(**tool_call.arguments)
         else:
             return tool_call.arguments
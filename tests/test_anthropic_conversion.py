@@ -1,5 +1,6 @@
 """Unit tests for Anthropic prompt to API format conversion logic"""
 
+from anthropic.types import Message
 from pydantic import BaseModel
 
 from prompter.schemas import (
@@ -15,10 +16,18 @@ from prompter.schemas import (
     User,
 )
 from prompter.anthropic_executor import (
+    BLOCK_CONVERTERS,
+    AnthropicParams,
+    ClaudeExecutor,
     block_to_anthropic_content,
+    build_anthropic_kwargs,
+    build_anthropic_messages,
     content_list_to_anthropic,
     tool_to_anthropic,
     merge_consecutive_roles,
+    parse_anthropic_response,
+    parse_row_outputs,
+    rows_to_prompt,
 )
 
 
@@ -71,6 +80,16 @@ def test_image_prompt():
     }
 
 
+def test_url_image_is_passed_through():
+    user = User("What's this?", Image.url("https://example.com/cat.jpg"))
+
+    msg = block_to_anthropic_content(user)
+    assert msg[0]["content"][1] == {
+        "type": "image",
+        "source": {"type": "url", "url": "https://example.com/cat.jpg"},
+    }
+
+
 def test_tool_conversion():
     tool = Tool(
         name="get_weather",
@@ -170,7 +189,7 @@ def test_tool_use_conversion():
             {
                 "type": "tool_result",
                 "tool_use_id": "call_123",
-                "content": '{"temperature": 20, "conditions": "sunny"}',
+                "content": '{"temperature":20,"conditions":"sunny"}',
             }
         ],
     }
@@ -250,3 +269,210 @@ def test_conversation_with_mixed_content():
     assert messages[1]["role"] == "assistant"
     assert messages[2]["role"] == "assistant"  # tool call
     assert messages[2]["content"][0]["type"] == "tool_use"
+
+
+def test_cache_breakpoints_mark_last_user_turns():
+    """Test cache_control is added to the last content item of recent user turns"""
+    messages = [
+        {"role": "user", "content": [{"type": "text", "text": "First"}]},
+        {"role": "assistant", "content": [{"type": "text", "text": "Reply"}]},
+        {"role": "user", "content": [{"type": "text", "text": "Second"}]},
+    ]
+
+    ClaudeExecutor.Converters.add_cache_breakpoints(messages, 1)
+
+    assert "cache_control" not in messages[0]["content"][0]
+    assert messages[2]["content"][0] == {
+        "type": "text",
+        "text": "Second",
+        "cache_control": {"type": "ephemeral"},
+    }
+
+
+def test_cache_breakpoints_skip_turns_with_url_images():
+    """Test the breakpoint lands on the last user turn with only static content"""
+    url_image = {"type": "image", "source": {"type": "url", "url": "https://x/a.png"}}
+    messages = [
+        {"role": "user", "content": [{"type": "text", "text": "Describe these"}]},
+        {"role": "assistant", "content": [{"type": "text", "text": "Send them"}]},
+        {"role": "user", "content": [url_image, {"type": "text", "text": "This"}]},
+    ]
+
+    ClaudeExecutor.Converters.add_cache_breakpoints(messages, 1)
+
+    assert "cache_control" not in messages[2]["content"][-1]
+    assert messages[0]["content"][-1]["cache_control"] == {"type": "ephemeral"}
+
+
+def test_cached_system_prompt():
+    """Test system prompt is wrapped in a cacheable text block"""
+    assert ClaudeExecutor.Converters.system_to_anthropic("Be brief", False) == (
+        "Be brief"
+    )
+    assert ClaudeExecutor.Converters.system_to_anthropic("Be brief", True) == [
+        {"type": "text", "text": "Be brief", "cache_control": {"type": "ephemeral"}}
+    ]
+
+
+def test_text_block_fast_path_matches_generic_conversion():
+    """Test the text-only fast path produces the same message as full dispatch"""
+    user = User("Hello", Text("world"))
+
+    fast = ClaudeExecutor.Converters.text_block_to_anthropic(user)
+    assert [fast] == block_to_anthropic_content(user)
+
+
+def test_text_block_fast_path_skips_images():
+    """Test blocks with non-text content fall back to full dispatch"""
+    img = Image(source="data:image/png;base64,iVBORw0KGgo=", media_type="image/png")
+    assert ClaudeExecutor.Converters.text_block_to_anthropic(User("Hi", img)) is None
+    assert ClaudeExecutor.Converters.text_block_to_anthropic(System("Hi")) is None
+
+
+def test_merge_consecutive_roles_does_not_mutate_input():
+    """Test merging leaves the caller's message content lists untouched"""
+    first = {"role": "user", "content": [{"type": "text", "text": "Hello"}]}
+    second = {"role": "user", "content": [{"type": "text", "text": "Again"}]}
+
+    merged = merge_consecutive_roles([first, second])
+
+    assert len(merged) == 1
+    assert len(merged[0]["content"]) == 2
+    assert first["content"] == [{"type": "text", "text": "Hello"}]
+
+
+def message(*content):
+    return Message.model_validate(
+        {
+            "id": "msg_1",
+            "type": "message",
+            "role": "assistant",
+            "model": "claude-3-5-sonnet-20241022",
+            "content": list(content),
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {"input_tokens": 1, "output_tokens": 1},
+        }
+    )
+
+
+def test_parse_response_text_blocks():
+    """Test response text is taken as-is for one block and space-joined for several"""
+    single = message({"type": "text", "text": "Hello"})
+    multiple = message(
+        {"type": "text", "text": "Hello"}, {"type": "text", "text": "world"}
+    )
+
+    assert parse_anthropic_response(single, []).text() == "Hello"
+    assert parse_anthropic_response(multiple, []).text() == "Hello world"
+    assert parse_anthropic_response(message(), []).text() == ""
+
+
+def test_cache_breakpoints_skip_short_prefixes():
+    """Test breakpoints are only placed once the cached prefix is long enough"""
+    messages = [
+        {"role": "user", "content": [{"type": "text", "text": "x" * 400}]},
+        {"role": "assistant", "content": [{"type": "text", "text": "ok"}]},
+        {"role": "user", "content": [{"type": "text", "text": "short"}]},
+        {"role": "assistant", "content": [{"type": "text", "text": "ok"}]},
+        {"role": "user", "content": [{"type": "text", "text": "x" * 400}]},
+    ]
+
+    ClaudeExecutor.Converters.add_cache_breakpoints(messages, 4, min_tokens=150)
+
+    assert "cache_control" in messages[4]["content"][-1]
+    assert "cache_control" not in messages[2]["content"][-1]
+    assert "cache_control" not in messages[0]["content"][-1]
+
+
+def test_mutated_blocks_are_reconverted():
+    """Test edits to a block between requests reach the next request"""
+    question = User("Weather?")
+    tool_use = ToolUse(name="get_weather", arguments={"location": "Paris"})
+    prompt = Prompt(conversation=[question, tool_use])
+
+    first, _ = build_anthropic_messages(prompt)
+    tool_use.result = "Sunny"
+    question.content.append(Text(" In Paris"))
+    second, _ = build_anthropic_messages(prompt)
+
+    assert len(first) == 2
+    assert second[0]["content"][-1] == {"type": "text", "text": " In Paris"}
+    assert second[-1] == {
+        "role": "user",
+        "content": [
+            {"type": "tool_result", "tool_use_id": tool_use.id, "content": "Sunny"}
+        ],
+    }
+
+
+def test_tools_breakpoint_without_system_prompt():
+    """Test the tool list carries the breakpoint when there is no system prompt"""
+    params = AnthropicParams(enable_prompt_cache=True, cache_min_tokens=10)
+    tool = Tool(name="get_weather", description="Get weather", params=WeatherParams)
+    tools = [tool_to_anthropic(tool)]
+
+    kwargs = build_anthropic_kwargs(params, [], None, tools)
+    with_system = build_anthropic_kwargs(params, [], "Be brief", tools)
+
+    assert kwargs["tools"][-1]["cache_control"] == {"type": "ephemeral"}
+    assert "cache_control" not in tools[-1]
+    assert "cache_control" not in with_system["tools"][-1]
+    assert with_system["system"][0]["cache_control"] == {"type": "ephemeral"}
+
+
+def test_rows_are_marshaled_into_a_forced_tool_prompt():
+    """Test rows are tagged with their index and the rows tool is forced"""
+    prompt = rows_to_prompt(["first", "second"], system="Uppercase each row")
+
+    assert prompt.system == "Uppercase each row"
+    assert prompt.conversation[0].content[0].content == (
+        "<row id=0>first</row>\n<row id=1>second</row>"
+    )
+    assert prompt.tool_choice == "record_rows"
+    assert [tool.name for tool in prompt.tools] == ["record_rows"]
+
+
+def test_row_outputs_are_unpacked_by_id():
+    """Test row outputs land at their ids and unknown or missing rows are None"""
+    rows = [
+        {"id": 2, "output": "C"},
+        {"id": 0, "output": "A"},
+        {"id": 7, "output": "out of range"},
+    ]
+    tool_use = {
+        "type": "tool_use",
+        "id": "toolu_1",
+        "name": "record_rows",
+        "input": {"rows": rows},
+    }
+    response = parse_anthropic_response(message(tool_use), [])
+
+    assert parse_row_outputs(response, 3) == ["A", None, "C"]
+    assert parse_row_outputs(parse_anthropic_response(message(), []), 2) == [
+        None,
+        None,
+    ]
+
+
+def test_tool_choice_conversion():
+    convert = ClaudeExecutor.Converters.tool_choice_to_anthropic
+    assert convert("auto") is None
+    assert convert("required") == {"type": "any"}
+    assert convert("none") == {"type": "none"}
+    assert convert("get_weather") == {"type": "tool", "name": "get_weather"}
+
+
+def test_block_subclasses_use_parent_converter():
+    """Test subclasses resolve to their parent's converter and are memoized"""
+
+    class Note(User):
+        pass
+
+    try:
+        converted = block_to_anthropic_content(Note("Hi"))
+        assert BLOCK_CONVERTERS[Note] is BLOCK_CONVERTERS[User]
+    finally:
+        BLOCK_CONVERTERS.pop(Note, None)
+
+    assert converted == block_to_anthropic_content(User("Hi"))
@@ -1,3 +1,8 @@
+import asyncio
+
+import pytest
+
+from prompter.anthropic_executor import ClaudeExecutor
 from prompter.schemas import Prompt, User
 
 
@@ -17,3 +22,78 @@ def test_basic_chat(llm_executor):
 
     for message in response.messages():
         assert message.content in ["YES", "NO"]
+
+
+def test_aexecute_basic_chat(llm_executor):
+    """Test the async client answers the same prompt as execute"""
+    prompt = Prompt(
+        system="Respond with only the word YES or NO",
+        conversation=[User("Is the sky blue?")],
+    )
+
+    response = asyncio.run(llm_executor.aexecute(prompt))
+    response.raise_for_status()
+
+    assert response.text().strip().upper() in ["YES", "NO"]
+
+
+def test_execute_many_returns_responses_in_prompt_order(llm_executor):
+    """Test execute_many runs prompts concurrently and keeps their order"""
+    prompts = [
+        Prompt(
+            system="Repeat the number you are given. Respond with only that number",
+            conversation=[User(number)],
+        )
+        for number in ["1", "2", "3"]
+    ]
+
+    responses = llm_executor.execute_many(prompts, max_concurrency=2)
+
+    assert [response.text().strip() for response in responses] == ["1", "2", "3"]
+
+
+def test_execute_many_raises_the_first_error(llm_executor):
+    """Test execute_many propagates a failed request instead of returning it"""
+    prompts = [Prompt(conversation=[User("Hi")]), Prompt(conversation=[])]
+
+    with pytest.raises(Exception):
+        llm_executor.execute_many(prompts)
+
+
+def test_aexecute_many_returns_responses_in_prompt_order(llm_executor):
+    """Test aexecute_many gathers prompts concurrently and keeps their order"""
+    prompts = [
+        Prompt(
+            system="Repeat the number you are given. Respond with only that number",
+            conversation=[User(number)],
+        )
+        for number in ["1", "2", "3"]
+    ]
+
+    responses = asyncio.run(llm_executor.aexecute_many(prompts, max_concurrency=2))
+
+    assert [response.text().strip() for response in responses] == ["1", "2", "3"]
+
+
+def test_aexecute_many_can_return_errors_in_place(llm_executor):
+    """Test return_exceptions keeps a failed request from discarding its siblings"""
+    prompts = [
+        Prompt(system="Respond with only the word OK", conversation=[User("Hi")]),
+        Prompt(conversation=[]),
+    ]
+
+    results = asyncio.run(llm_executor.aexecute_many(prompts, return_exceptions=True))
+
+    assert results[0].text().strip() == "OK"
+    assert isinstance(results[1], Exception)
+
+
+def test_claude_execute_rows_returns_one_output_per_row():
+    """Test rows sent in one call come back in input order"""
+    rows = ["apple", "banana", "cherry"]
+
+    outputs = ClaudeExecutor().execute_rows(
+        rows, system="Reply with each row in uppercase", batch_size=2
+    )
+
+    assert outputs == ["APPLE", "BANANA", "CHERRY"]
@@ -0,0 +1,25 @@
+import os
+
+import pytest
+
+from prompter.schemas import Prompt, User
+
+pytestmark = pytest.mark.skipif(
+    not os.getenv("PROMPTER_BATCH_TESTS"),
+    reason="set PROMPTER_BATCH_TESTS=1 to submit live batch jobs",
+)
+
+
+def test_execute_batch_returns_responses_in_prompt_order(llm_executor):
+    """Test batch results are parsed and returned in prompt order"""
+    prompts = [
+        Prompt(
+            system="Repeat the number you are given. Respond with only that number",
+            conversation=[User(number)],
+        )
+        for number in ["1", "2"]
+    ]
+
+    responses = llm_executor.execute_batch(prompts, timeout=3600)
+
+    assert [response.text().strip() for response in responses] == ["1", "2"]
@@ -0,0 +1,81 @@
+import asyncio
+import gzip
+
+import httpx
+
+from prompter.compression import (
+    AsyncCompressingTransport,
+    CompressingTransport,
+    compress_body,
+    zstandard,
+)
+
+
+class RecordingTransport(httpx.BaseTransport):
+    def __init__(self):
+        self.requests = []
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        return httpx.Response(200)
+
+
+class AsyncRecordingTransport(httpx.AsyncBaseTransport):
+    def __init__(self):
+        self.requests = []
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        return httpx.Response(200)
+
+
+def decompress(body: bytes, encoding: str) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdDecompressor().decompress(body)
+    return gzip.decompress(body)
+
+
+def test_large_bodies_are_compressed():
+    recorder = RecordingTransport()
+    client = httpx.Client(transport=CompressingTransport(recorder, min_size=16))
+    body = b'{"messages": "' + b"x" * 4096 + b'"}'
+
+    client.post("https://example.com/v1/messages", content=body)
+
+    sent = recorder.requests[0]
+    encoding = sent.headers["content-encoding"]
+    assert int(sent.headers["content-length"]) == len(sent.content)
+    assert len(sent.content) < len(body)
+    assert decompress(sent.content, encoding) == body
+
+
+def test_async_large_bodies_are_compressed():
+    recorder = AsyncRecordingTransport()
+    body = b'{"messages": "' + b"x" * 4096 + b'"}'
+
+    async def post():
+        transport = AsyncCompressingTransport(recorder, min_size=16)
+        async with httpx.AsyncClient(transport=transport) as client:
+            await client.post("https://example.com/v1/messages", content=body)
+
+    asyncio.run(post())
+
+    sent = recorder.requests[0]
+    assert int(sent.headers["content-length"]) == len(sent.content)
+    assert decompress(sent.content, sent.headers["content-encoding"]) == body
+
+
+def test_small_bodies_are_sent_unchanged():
+    recorder = RecordingTransport()
+    client = httpx.Client(transport=CompressingTransport(recorder, min_size=1024))
+
+    client.post("https://example.com/v1/messages", content=b"{}")
+
+    sent = recorder.requests[0]
+    assert "content-encoding" not in sent.headers
+    assert sent.content == b"{}"
+
+
+def test_compress_body_round_trip():
+    compressed, encoding = compress_body(b"hello" * 100)
+    assert decompress(compressed, encoding) == b"hello" * 100
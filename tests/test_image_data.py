@@ -0,0 +1,211 @@
+import asyncio
+import base64
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from prompter import image_data
+from prompter.image_data import (
+    aprefetch_urls,
+    cached_url_to_b64,
+    file_to_b64,
+    file_to_data_url,
+    prefetch_urls,
+)
+
+
+def test_file_to_b64_encodes_file(tmp_path):
+    path = tmp_path / "pixel.png"
+    path.write_bytes(b"\x89PNG\r\n")
+
+    assert file_to_b64(path) == base64.b64encode(b"\x89PNG\r\n").decode("utf-8")
+
+
+def test_file_to_b64_reencodes_modified_file(tmp_path):
+    path = tmp_path / "pixel.png"
+    path.write_bytes(b"first")
+    os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+    assert file_to_b64(path) == base64.b64encode(b"first").decode("utf-8")
+
+    path.write_bytes(b"second")
+    os.utime(path, ns=(2_000_000_000, 2_000_000_000))
+    assert file_to_b64(path) == base64.b64encode(b"second").decode("utf-8")
+
+
+def test_file_to_b64_empty_file(tmp_path):
+    path = tmp_path / "empty.png"
+    path.write_bytes(b"")
+
+    assert file_to_b64(path) == ""
+
+
+def test_file_to_b64_large_file_matches_single_pass(tmp_path):
+    data = os.urandom(9 * 1024 * 1024 + 1)
+    path = tmp_path / "large.png"
+    path.write_bytes(data)
+
+    assert file_to_b64(path) == base64.b64encode(data).decode("ascii")
+
+
+def test_file_encoding_is_cached_until_modified(tmp_path):
+    path = tmp_path / "pixel.png"
+    path.write_bytes(b"first")
+    os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+
+    first = file_to_b64(path)
+    assert file_to_b64(path) is first
+    assert file_to_data_url(path, "image/png") == "data:image/png;base64," + first
+
+    path.write_bytes(b"second!")
+    os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+    assert file_to_data_url(path, "image/png").endswith(
+        base64.b64encode(b"second!").decode()
+    )
+
+
+def test_file_cache_is_bounded_by_encoded_bytes(tmp_path, monkeypatch):
+    monkeypatch.setattr(image_data, "FILE_CACHE_BYTES", 16)
+    paths = []
+    for name in ["a", "b", "c"]:
+        path = tmp_path / f"{name}.png"
+        path.write_bytes(name.encode() * 6)
+        paths.append(path)
+
+    encoded = [file_to_b64(path) for path in paths]
+
+    assert file_to_b64(paths[2]) is encoded[2]
+    assert file_to_b64(paths[1]) is encoded[1]
+    assert file_to_b64(paths[0]) is not encoded[0]
+    assert file_to_b64(paths[0]) == encoded[0]
+
+
+@pytest.fixture
+def image_server():
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests.append((self.path, self.headers.get("If-None-Match")))
+            if self.path.startswith("/redirect"):
+                self.send_response(302)
+                self.send_header("location", self.path.replace("/redirect", ""))
+                self.end_headers()
+                return
+            if self.path == "/missing.png":
+                self.send_error(404)
+                return
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("content-type", "image/png")
+            self.send_header("etag", '"v1"')
+            self.send_header("content-length", "4")
+            self.end_headers()
+            self.wfile.write(b"\x89PNG")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}", requests
+    server.shutdown()
+
+
+def test_prefetched_urls_are_served_from_cache(image_server):
+    base_url, requests = image_server
+    urls = [f"{base_url}/a.png", f"{base_url}/b.png", f"{base_url}/a.png"]
+
+    prefetch_urls(urls)
+    image_data = cached_url_to_b64(f"{base_url}/b.png")
+
+    assert sorted(path for path, _ in requests) == ["/a.png", "/b.png"]
+    assert image_data.content_type == "image/png"
+    assert image_data.base64_data == base64.b64encode(b"\x89PNG").decode("utf-8")
+
+
+def test_async_prefetch_populates_cache(image_server):
+    base_url, requests = image_server
+    urls = [f"{base_url}/c.png", f"{base_url}/d.png"]
+
+    asyncio.run(aprefetch_urls(urls))
+    cached_url_to_b64(f"{base_url}/c.png")
+
+    assert sorted(path for path, _ in requests) == ["/c.png", "/d.png"]
+
+
+def test_redirects_are_followed(image_server):
+    base_url, requests = image_server
+
+    image_data = cached_url_to_b64(f"{base_url}/redirect/f.png")
+    asyncio.run(aprefetch_urls([f"{base_url}/redirect/g.png"]))
+    cached_url_to_b64(f"{base_url}/redirect/g.png")
+
+    assert image_data.base64_data == base64.b64encode(b"\x89PNG").decode("utf-8")
+    assert [path for path, _ in requests] == [
+        "/redirect/f.png",
+        "/f.png",
+        "/redirect/g.png",
+        "/g.png",
+    ]
+
+
+def test_async_prefetch_reuses_a_client_per_event_loop(image_server):
+    base_url, requests = image_server
+
+    async def prefetch(name):
+        client = image_data.async_http_client()
+        await aprefetch_urls([f"{base_url}/{name}"])
+        return client, image_data.async_http_client()
+
+    first, first_after = asyncio.run(prefetch("h.png"))
+    second, _ = asyncio.run(prefetch("i.png"))
+
+    assert first_after is first
+    assert second is not first
+    assert sorted(path for path, _ in requests) == ["/h.png", "/i.png"]
+
+
+def test_async_prefetch_uses_a_given_client(image_server):
+    base_url, requests = image_server
+
+    async def prefetch():
+        async with httpx.AsyncClient() as client:
+            await aprefetch_urls([f"{base_url}/j.png"], client)
+
+    asyncio.run(prefetch())
+
+    assert [path for path, _ in requests] == ["/j.png"]
+
+
+def test_expired_entry_revalidates_with_etag(image_server, monkeypatch):
+    base_url, requests = image_server
+    url = f"{base_url}/e.png"
+    first = cached_url_to_b64(url)
+
+    monkeypatch.setattr(image_data, "URL_CACHE_TTL_SECONDS", -1)
+    second = cached_url_to_b64(url)
+
+    assert requests == [("/e.png", None), ("/e.png", '"v1"')]
+    assert second == first
+
+
+def test_error_responses_are_not_encoded(image_server):
+    base_url, _ = image_server
+
+    with pytest.raises(httpx.HTTPStatusError):
+        cached_url_to_b64(f"{base_url}/missing.png")
+
+
+def test_file_to_data_url_large_file_matches_single_pass(tmp_path):
+    data = os.urandom(9 * 1024 * 1024 + 2)
+    path = tmp_path / "large.jpg"
+    path.write_bytes(data)
+
+    expected = "data:image/jpeg;base64," + base64.b64encode(data).decode("ascii")
+    assert file_to_data_url(path, "image/jpeg") == expected
@@ -0,0 +1,215 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import openai
+import pytest
+
+from prompter.anthropic_executor import ClaudeExecutor
+from prompter.openai_executor import OpenAIExecutor
+from prompter.schemas import Prompt, User
+
+ANTHROPIC_MESSAGE = {
+    "id": "msg_1",
+    "type": "message",
+    "role": "assistant",
+    "model": "claude-3-5-sonnet-20241022",
+    "content": [{"type": "text", "text": "Hello"}],
+    "stop_reason": "end_turn",
+    "stop_sequence": None,
+    "usage": {"input_tokens": 1, "output_tokens": 1},
+}
+
+OPENAI_COMPLETION = {
+    "id": "chatcmpl-1",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "gpt-4o",
+    "choices": [
+        {
+            "index": 0,
+            "finish_reason": "stop",
+            "message": {"role": "assistant", "content": "Hello"},
+        }
+    ],
+}
+
+OPENAI_CHUNK = {
+    "id": "chatcmpl-1",
+    "object": "chat.completion.chunk",
+    "created": 0,
+    "model": "gpt-4o",
+    "choices": [{"index": 0, "delta": {"content": "Hello"}}],
+}
+
+ANTHROPIC_BATCH = {
+    "id": "msgbatch_1",
+    "type": "message_batch",
+    "processing_status": "in_progress",
+    "request_counts": {
+        "processing": 1,
+        "succeeded": 0,
+        "errored": 0,
+        "canceled": 0,
+        "expired": 0,
+    },
+    "created_at": "2024-01-01T00:00:00Z",
+    "expires_at": "2024-01-02T00:00:00Z",
+    "ended_at": None,
+    "archived_at": None,
+    "cancel_initiated_at": None,
+    "results_url": None,
+}
+
+OPENAI_BATCH = {
+    "id": "batch_1",
+    "object": "batch",
+    "endpoint": "/v1/chat/completions",
+    "input_file_id": "file_1",
+    "completion_window": "24h",
+    "status": "in_progress",
+    "created_at": 0,
+}
+
+
+@pytest.fixture
+def api_server():
+    disconnected = threading.Event()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers["content-length"])))
+            if request.get("stream"):
+                self.stream_until_disconnected()
+                return
+            if request.get("messages", [{}])[-1].get("content") == "fail":
+                self.send_json({"error": {"message": "rejected"}}, status=400)
+            elif self.path.endswith("/chat/completions"):
+                self.send_json(OPENAI_COMPLETION)
+            elif self.path.endswith("/messages/batches"):
+                self.send_json(ANTHROPIC_BATCH)
+            else:
+                self.send_json(ANTHROPIC_MESSAGE)
+
+        def do_GET(self):
+            if self.path.startswith("/v1/batches/"):
+                self.send_json(OPENAI_BATCH)
+            else:
+                self.send_json(ANTHROPIC_BATCH)
+
+        def send_json(self, value, status=200):
+            body = json.dumps(value).encode()
+            self.send_response(status)
+            self.send_header("content-type", "application/json")
+            self.send_header("content-length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def stream_until_disconnected(self):
+            self.send_response(200)
+            self.send_header("content-type", "text/event-stream")
+            self.send_header("connection", "close")
+            self.end_headers()
+            event = f"data: {json.dumps(OPENAI_CHUNK)}\n\n".encode()
+            try:
+                while True:
+                    self.wfile.write(event)
+                    self.wfile.flush()
+                    time.sleep(0.01)
+            except (BrokenPipeError, ConnectionResetError):
+                disconnected.set()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}", disconnected
+    server.shutdown()
+
+
+def test_claude_aexecute_survives_separate_event_loops(api_server, monkeypatch):
+    """Test each asyncio.run gets a client bound to its own loop"""
+    base_url, _ = api_server
+    monkeypatch.setenv("ANTHROPIC_BASE_URL", base_url)
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test")
+    executor = ClaudeExecutor()
+    prompt = Prompt(conversation=[User("Hi")])
+
+    first = asyncio.run(executor.aexecute(prompt))
+    second = asyncio.run(executor.aexecute(prompt))
+
+    assert first.text() == second.text() == "Hello"
+
+
+def test_openai_aexecute_survives_separate_event_loops(api_server, monkeypatch):
+    """Test each asyncio.run gets a client bound to its own loop"""
+    base_url, _ = api_server
+    monkeypatch.setenv("OPENAI_BASE_URL", f"{base_url}/v1")
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    executor = OpenAIExecutor()
+    prompts = [Prompt(conversation=[User("Hi")])]
+
+    first = asyncio.run(executor.aexecute(prompts[0]))
+    second = asyncio.run(executor.aexecute_many(prompts))
+
+    assert first.text() == second[0].text() == "Hello"
+
+
+def test_openai_stream_closes_connection_when_consumer_stops(api_server, monkeypatch):
+    """Test breaking out of a stream releases the HTTP connection"""
+    base_url, disconnected = api_server
+    monkeypatch.setenv("OPENAI_BASE_URL", f"{base_url}/v1")
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    executor = OpenAIExecutor()
+
+    for chunk in executor.execute_stream(Prompt(conversation=[User("Hi")])):
+        assert chunk == "Hello"
+        break
+
+    assert disconnected.wait(5)
+
+
+def test_claude_execute_batch_times_out(api_server, monkeypatch):
+    """Test a batch that never ends raises once the timeout passes"""
+    base_url, _ = api_server
+    monkeypatch.setenv("ANTHROPIC_BASE_URL", base_url)
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test")
+    executor = ClaudeExecutor()
+
+    with pytest.raises(TimeoutError, match="msgbatch_1"):
+        executor.execute_batch(
+            [Prompt(conversation=[User("Hi")])], timeout=0.2, poll_interval=0.05
+        )
+
+
+def test_openai_batch_results_times_out(api_server, monkeypatch):
+    """Test polling a batch that never finishes raises once the timeout passes"""
+    base_url, _ = api_server
+    monkeypatch.setenv("OPENAI_BASE_URL", f"{base_url}/v1")
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    executor = OpenAIExecutor()
+    prompts = [Prompt(conversation=[User("Hi")])]
+
+    with pytest.raises(TimeoutError, match="batch_1"):
+        executor.batch_results("batch_1", prompts, timeout=0.2, poll_interval=0.05)
+
+
+def test_openai_aexecute_many_error_contract(api_server, monkeypatch):
+    """Test failures raise by default and stay in place with return_exceptions"""
+    base_url, _ = api_server
+    monkeypatch.setenv("OPENAI_BASE_URL", f"{base_url}/v1")
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    executor = OpenAIExecutor()
+    prompts = [Prompt(conversation=[User(text)]) for text in ["Hi", "fail"]]
+
+    with pytest.raises(openai.BadRequestError):
+        asyncio.run(executor.aexecute_many(prompts))
+    results = asyncio.run(executor.aexecute_many(prompts, return_exceptions=True))
+
+    assert results[0].text() == "Hello"
+    assert isinstance(results[1], openai.BadRequestError)
@@ -1,9 +1,15 @@
+import json
+
+import pytest
+from openai.types.chat import ChatCompletionChunk
 from pydantic import BaseModel
 
 from prompter.schemas import (
     Assistant,
     Image,
+    LLMResponse,
     Prompt,
+    ResponseStream,
     System,
     Text,
     Tool,
@@ -12,7 +18,15 @@ from prompter.schemas import (
     User,
 )
 from prompter.openai_executor import (
+    BLOCK_CONVERTERS,
+    ResponseCache,
+    assemble_openai_stream,
     block_to_openai_messages,
+    build_openai_messages,
+    copy_response,
+    json_schema_response_format,
+    parse_batch_output,
+    request_cache_key,
     tool_to_openai,
 )
 
@@ -157,7 +171,7 @@ def test_tool_call_conversion():
                 "type": "function",
                 "function": {
                     "name": "get_weather",
-                    "arguments": '{"location": "Paris"}',
+                    "arguments": '{"location":"Paris"}',
                 },
             }
         ],
@@ -185,7 +199,7 @@ def test_tool_use_conversion():
                     "type": "function",
                     "function": {
                         "name": "get_weather",
-                        "arguments": '{"location": "Paris"}',
+                        "arguments": '{"location":"Paris"}',
                     },
                 }
             ],
@@ -193,7 +207,7 @@ def test_tool_use_conversion():
         {
             "role": "tool",
             "tool_call_id": "call_123",
-            "content": '{"temperature": 20, "conditions": "sunny"}',
+            "content": '{"temperature":20,"conditions":"sunny"}',
         },
     ]
 
@@ -221,7 +235,7 @@ def test_tool_use_with_error():
                     "type": "function",
                     "function": {
                         "name": "get_weather",
-                        "arguments": '{"location": "InvalidCity"}',
+                        "arguments": '{"location":"InvalidCity"}',
                     },
                 }
             ],
@@ -275,12 +289,12 @@ def test_conversation_with_mixed_content():
                     "type": "function",
                     "function": {
                         "name": "get_weather",
-                        "arguments": '{"location": "Paris"}',
+                        "arguments": '{"location":"Paris"}',
                     },
                 }
             ],
         },
-        {"role": "tool", "tool_call_id": "call_1", "content": '{"temp": 20}'},
+        {"role": "tool", "tool_call_id": "call_1", "content": '{"temp":20}'},
         {"role": "assistant", "content": "It's 20°C in Paris."},
     ]
 
@@ -346,3 +360,176 @@ def test_tool_call_with_string_arguments():
 
     actual = block_to_openai_messages(tool_call)
     assert actual == [expected]
+
+
+def test_response_format_dicts_are_reused():
+    first = json_schema_response_format(WeatherParams)
+
+    assert json_schema_response_format(WeatherParams) is first
+    assert first["json_schema"]["name"] == "WeatherParams"
+    assert first["json_schema"]["strict"] is True
+
+
+def test_mutated_blocks_are_reconverted():
+    tool_use = ToolUse(name="get_weather", arguments={"location": "Paris"})
+    prompt = Prompt(conversation=[User("Weather?"), tool_use])
+
+    first = build_openai_messages(prompt)
+    tool_use.result = "Sunny"
+    second = build_openai_messages(prompt)
+
+    assert len(first) == 2
+    assert second[-1] == {
+        "role": "tool",
+        "tool_call_id": tool_use.id,
+        "content": "Sunny",
+    }
+
+
+def batch_line(custom_id, text=None, error=None):
+    if error is not None:
+        response = {"status_code": 400, "body": {"error": {"message": error}}}
+    else:
+        completion = {
+            "id": "chatcmpl-1",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "gpt-4o",
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": text},
+                }
+            ],
+        }
+        response = {"status_code": 200, "body": completion}
+    return json.dumps({"custom_id": custom_id, "response": response, "error": None})
+
+
+def test_batch_output_is_returned_in_prompt_order():
+    prompts = [Prompt(conversation=[User(text)]) for text in ["a", "b"]]
+    output = "\n".join([batch_line("1", "B"), batch_line("0", "A")])
+
+    results = parse_batch_output(output, prompts)
+
+    assert [r.text() for r in results] == ["A", "B"]
+
+
+def test_batch_errors_and_missing_results_raise():
+    prompts = [Prompt(conversation=[User(text)]) for text in ["a", "b"]]
+    errors = batch_line("1", error="Invalid model")
+
+    with pytest.raises(RuntimeError, match="Batch request 1 failed"):
+        parse_batch_output("\n".join([errors, batch_line("0", "A")]), prompts)
+    with pytest.raises(RuntimeError, match="no result for requests 1"):
+        parse_batch_output(batch_line("0", "A"), prompts)
+
+
+def test_build_messages_prepends_prompt_system_once():
+    prepended = build_openai_messages(
+        Prompt(system="Be brief", conversation=[User("Hi")])
+    )
+    explicit = build_openai_messages(
+        Prompt(system="Be brief", conversation=[System("Be kind"), User("Hi")])
+    )
+
+    assert prepended == [
+        {"role": "system", "content": "Be brief"},
+        {"role": "user", "content": "Hi"},
+    ]
+    assert explicit == [
+        {"role": "system", "content": "Be kind"},
+        {"role": "user", "content": "Hi"},
+    ]
+
+
+def test_build_messages_treats_system_subclasses_as_system():
+    class Persona(System):
+        pass
+
+    try:
+        messages = build_openai_messages(
+            Prompt(system="Be brief", conversation=[Persona("Be kind"), User("Hi")])
+        )
+    finally:
+        BLOCK_CONVERTERS.pop(Persona, None)
+
+    assert messages == [
+        {"role": "system", "content": "Be kind"},
+        {"role": "user", "content": "Hi"},
+    ]
+
+
+def test_cached_responses_are_copied_with_current_tools():
+    tool = Tool(name="get_weather", description="Get weather", params=WeatherParams)
+    call = ToolCall(name="get_weather", arguments={"location": "Paris"}, id="call_1")
+    cached = LLMResponse(
+        raw_response=None, tools=[], _text_content="", _tool_calls=[call]
+    )
+
+    copied = copy_response(cached, [tool])
+    copied.tool_call().arguments["location"] = "Rome"
+
+    assert copied.tools == [tool]
+    assert cached.tool_call().arguments == {"location": "Paris"}
+
+
+def test_response_cache_evicts_least_recently_used():
+    cache = ResponseCache(maxsize=2)
+    responses = {
+        key: LLMResponse(raw_response=None, tools=[], _text_content=key, _tool_calls=[])
+        for key in "abc"
+    }
+
+    cache["a"] = responses["a"]
+    cache["b"] = responses["b"]
+    cache.get("a")
+    cache["c"] = responses["c"]
+
+    assert sorted(cache) == ["a", "c"]
+    assert cache.get("b") is None
+
+
+def test_request_cache_key_ignores_key_order():
+    first = {"model": "gpt-4o", "messages": [{"role": "user", "content": "Hi"}]}
+    second = {"messages": [{"role": "user", "content": "Hi"}], "model": "gpt-4o"}
+
+    assert request_cache_key(first) == request_cache_key(second)
+    assert request_cache_key(first) != request_cache_key({**first, "model": "o1"})
+
+
+def stream_chunk(content=None, tool_calls=None):
+    choices = [{"index": 0, "delta": {"content": content, "tool_calls": tool_calls}}]
+    return ChatCompletionChunk.model_validate(
+        {
+            "id": "chatcmpl-1",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": "gpt-4o",
+            "choices": choices,
+        }
+    )
+
+
+def tool_delta(index, id=None, name=None, arguments=None):
+    return {"index": index, "id": id, "function": {"name": name, "arguments": arguments}}
+
+
+def test_stream_yields_text_and_assembles_tool_calls():
+    chunks = [
+        stream_chunk("Checking"),
+        stream_chunk(" now"),
+        stream_chunk(tool_calls=[tool_delta(0, "call_1", "get_weather", '{"loc')]),
+        stream_chunk(tool_calls=[tool_delta(0, arguments='ation":"Paris"}')]),
+    ]
+
+    stream = ResponseStream(assemble_openai_stream(iter(chunks), []))
+
+    assert list(stream) == ["Checking", " now"]
+    response = stream.response()
+    assert response.text() == "Checking now"
+    assert response.tool_call() == ToolCall(
+        name="get_weather", arguments={"location": "Paris"}, id="call_1"
+    )
+    assert response.tool_call().raw_arguments == '{"location":"Paris"}'
@@ -0,0 +1,21 @@
+import asyncio
+
+from prompter.openai_executor import OpenAIExecutor, ResponseCache
+from prompter.schemas import Prompt, User
+
+
+def test_repeated_prompt_is_served_from_cache():
+    """Test identical deterministic requests reuse the first response"""
+    executor = OpenAIExecutor(cache=ResponseCache())
+    prompt = Prompt(
+        system="Respond with only the word YES", conversation=[User("Ready?")]
+    )
+
+    first = executor.execute(prompt)
+    second = executor.execute(prompt)
+    from_async = asyncio.run(executor.aexecute(prompt))
+
+    assert len(executor.cache) == 1
+    assert second is not first
+    assert second.raw_response is first.raw_response
+    assert from_async.raw_response is first.raw_response
@@ -0,0 +1,50 @@
+import asyncio
+
+from prompter.schemas import AsyncResponseStream, LLMResponse, ResponseStream
+
+
+def chunks():
+    yield "Hello"
+    yield " world"
+    return LLMResponse(
+        raw_response=None, tools=[], _text_content="Hello world", _tool_calls=[]
+    )
+
+
+def test_stream_yields_text_then_final_response():
+    stream = ResponseStream(chunks())
+
+    assert list(stream) == ["Hello", " world"]
+    assert stream.final_response.text() == "Hello world"
+
+
+def test_response_drains_unread_chunks():
+    stream = ResponseStream(chunks())
+
+    assert stream.response().text() == "Hello world"
+    assert stream.response().text() == "Hello world"
+
+
+async def async_chunks():
+    yield "Hello"
+    yield " world"
+    yield LLMResponse(
+        raw_response=None, tools=[], _text_content="Hello world", _tool_calls=[]
+    )
+
+
+def test_async_stream_yields_text_then_final_response():
+    async def collect():
+        stream = AsyncResponseStream(async_chunks())
+        return [chunk async for chunk in stream], stream
+
+    chunks_seen, stream = asyncio.run(collect())
+
+    assert chunks_seen == ["Hello", " world"]
+    assert stream.final_response.text() == "Hello world"
+
+
+def test_async_response_drains_unread_chunks():
+    stream = AsyncResponseStream(async_chunks())
+
+    assert asyncio.run(stream.response()).text() == "Hello world"
@@ -0,0 +1,111 @@
+import pytest
+
+from prompter import semantic_cache
+from prompter.schemas import Image, LLMResponse, Prompt, ToolCall, ToolUse, User
+from prompter.semantic_cache import SemanticCache, prompt_cache_text
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    if request.param == "numpy" and semantic_cache.numpy is None:
+        pytest.skip("numpy is not installed")
+    if request.param == "python":
+        monkeypatch.setattr(semantic_cache, "numpy", None)
+    return request.param
+
+
+def letter_counts(text: str) -> list[float]:
+    letters = [c for c in text.lower() if c.isalpha()]
+    return [float(letters.count(chr(c))) for c in range(ord("a"), ord("z") + 1)]
+
+
+def response(text: str) -> LLMResponse:
+    return LLMResponse(raw_response=None, tools=[], _text_content=text, _tool_calls=[])
+
+
+def test_paraphrased_prompt_hits_within_scope(backend):
+    cache = SemanticCache(letter_counts)
+    miss = cache.probe(Prompt(conversation=[User("What's the weather?")]), "gpt-4o")
+    cache.add(miss, response("Sunny"))
+
+    hit = cache.probe(Prompt(conversation=[User("whats the weather")]), "gpt-4o")
+    other_scope = cache.probe(Prompt(conversation=[User("whats the weather")]), "o1")
+    unrelated = cache.probe(Prompt(conversation=[User("Tell me a joke")]), "gpt-4o")
+
+    assert miss.response is None
+    assert hit.response.text() == "Sunny"
+    assert other_scope.response is None
+    assert unrelated.response is None
+
+
+def test_tool_loop_follow_up_is_not_served_from_cache(backend):
+    cache = SemanticCache(letter_counts)
+    question = User("What's the weather in Paris?")
+    first = cache.probe(Prompt(conversation=[question]), "gpt-4o")
+    call = ToolCall(name="get_weather", arguments={"location": "Paris"})
+    cache.add(
+        first,
+        LLMResponse(raw_response=None, tools=[], _text_content="", _tool_calls=[call]),
+    )
+
+    tool_use = ToolUse(name="get_weather", arguments={"location": "Paris"})
+    tool_use.result = "Sunny"
+    follow_up = Prompt(conversation=[question, tool_use])
+
+    assert cache.probe(follow_up, "gpt-4o") is None
+
+
+def test_only_single_text_user_turns_are_eligible():
+    assert prompt_cache_text(Prompt(system="Be brief", conversation=[User("a")])) == (
+        "Be brief\na"
+    )
+    assert prompt_cache_text(Prompt(conversation=[User("a"), User("b")])) is None
+    assert (
+        prompt_cache_text(
+            Prompt(conversation=[User("What is this?", Image.url("https://x/a.png"))])
+        )
+        is None
+    )
+
+
+def test_oldest_entries_are_evicted_past_maxsize(backend):
+    cache = SemanticCache(letter_counts, maxsize=2)
+    prompts = {text: Prompt(conversation=[User(text)]) for text in ("aa", "bb", "cc")}
+    for text, prompt in prompts.items():
+        cache.add(cache.probe(prompt, "gpt-4o"), response(text.upper()))
+
+    assert len(cache) == 2
+    assert cache.probe(prompts["aa"], "gpt-4o").response is None
+    assert cache.probe(prompts["bb"], "gpt-4o").response.text() == "BB"
+    assert cache.probe(prompts["cc"], "gpt-4o").response.text() == "CC"
+
+    cache.add(cache.probe(prompts["aa"], "gpt-4o"), response("AA"))
+
+    assert cache.probe(prompts["bb"], "gpt-4o").response is None
+    assert cache.probe(prompts["aa"], "gpt-4o").response.text() == "AA"
+
+
+def one_hot(text: str) -> list[float]:
+    return [float(text.strip() == str(i)) for i in range(8)]
+
+
+def test_index_grows_in_steps_up_to_maxsize(backend, monkeypatch):
+    monkeypatch.setattr(semantic_cache, "GROWTH_ROWS", 2)
+    cache = SemanticCache(one_hot, maxsize=5)
+    prompts = [Prompt(conversation=[User(str(i))]) for i in range(8)]
+    for i, prompt in enumerate(prompts[:7]):
+        cache.add(cache.probe(prompt, "gpt-4o"), response(str(i)))
+
+    hits = [cache.probe(prompt, "gpt-4o").response for prompt in prompts]
+
+    assert len(cache) == 5
+    assert [hit.text() if hit else None for hit in hits] == [
+        None,
+        None,
+        "2",
+        "3",
+        "4",
+        "5",
+        "6",
+        None,
+    ]
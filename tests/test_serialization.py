@@ -0,0 +1,84 @@
+import datetime
+import enum
+import math
+import uuid
+from dataclasses import dataclass
+
+import pytest
+
+from prompter import serialization
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    if request.param == "orjson" and serialization.orjson is None:
+        pytest.skip("orjson is not installed")
+    if request.param == "json":
+        monkeypatch.setattr(serialization, "orjson", None)
+    return request.param
+
+
+def test_dumps_is_compact(backend):
+    assert serialization.dumps({"a": [1, 2], "b": "é"}) == '{"a":[1,2],"b":"é"}'
+
+
+def test_dumps_accepts_non_string_keys(backend):
+    assert serialization.dumps({1: "one"}) == '{"1":"one"}'
+
+
+def test_dumps_falls_back_for_values_orjson_rejects(backend):
+    assert serialization.dumps({"big": 2**70}) == '{"big":1180591620717411303424}'
+
+
+def test_loads_round_trips_dumps(backend):
+    value = {"location": "Paris", "days": [1, 2]}
+    assert serialization.loads(serialization.dumps(value)) == value
+
+
+def test_dumps_sort_keys_is_order_independent(backend):
+    assert serialization.dumps({"b": 1, "a": 2}, sort_keys=True) == serialization.dumps(
+        {"a": 2, "b": 1}, sort_keys=True
+    )
+
+
+def test_loads_keeps_integers_beyond_64_bits(backend):
+    assert serialization.loads('{"n": 123456789012345678901234567890}') == {
+        "n": 123456789012345678901234567890
+    }
+    assert serialization.loads(b"[-9223372036854775809]") == [-9223372036854775809]
+
+
+def test_loads_accepts_non_finite_numbers(backend):
+    parsed = serialization.loads('{"a": NaN, "b": Infinity}')
+
+    assert math.isnan(parsed["a"])
+    assert parsed["b"] == math.inf
+
+
+@dataclass
+class Point:
+    x: int
+    y: int
+
+
+class Color(enum.Enum):
+    RED = "red"
+
+
+def test_dumps_encodes_extended_types_the_same_way(backend):
+    value = {
+        "when": datetime.datetime(2024, 1, 2, 3, 4, 5),
+        "point": Point(1, 2),
+        "color": Color.RED,
+        "id": uuid.UUID(int=1),
+    }
+
+    assert serialization.dumps(value) == (
+        '{"when":"2024-01-02T03:04:05","point":{"x":1,"y":2},"color":"red",'
+        '"id":"00000000-0000-0000-0000-000000000001"}'
+    )
+
+
+def test_dumps_rejects_unknown_types(backend):
+    with pytest.raises(TypeError):
+        serialization.dumps({"value": object()})
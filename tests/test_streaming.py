@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+from pydantic import BaseModel
+
+from prompter.schemas import Prompt, Tool, User
+
+
+class WeatherArgs(BaseModel):
+    location: str
+
+
+WEATHER_TOOL = Tool(
+    name="get_weather",
+    description="Get the weather in a given location",
+    params=WeatherArgs,
+)
+
+
+def test_execute_stream_yields_text_then_final_response(llm_executor):
+    """Test streamed chunks add up to the final response text"""
+    prompt = Prompt(
+        system="Respond with only the words one two three",
+        conversation=[User("Count to three in words")],
+    )
+
+    stream = llm_executor.execute_stream(prompt)
+    chunks = list(stream)
+
+    assert chunks
+    assert "".join(chunks) == stream.final_response.text()
+    assert "three" in stream.final_response.text().lower()
+
+
+def test_execute_stream_collects_tool_calls(llm_executor):
+    """Test tool calls streamed in pieces are assembled in the final response"""
+    prompt = Prompt(
+        system="Always use the weather tool when asked about weather.",
+        conversation=[User("What's the weather like in Tokyo?")],
+        tools=[WEATHER_TOOL],
+    )
+
+    response = llm_executor.execute_stream(prompt).response()
+
+    tool_call = response.tool_call()
+    assert tool_call.name == "get_weather"
+    assert tool_call.arguments["location"].lower() == "tokyo"
+
+
+def test_aexecute_stream_yields_text_then_final_response(llm_executor):
+    """Test async streamed chunks add up to the final response text"""
+    if not hasattr(llm_executor, "aexecute_stream"):
+        pytest.skip("executor has no async streaming")
+    prompt = Prompt(
+        system="Respond with only the words one two three",
+        conversation=[User("Count to three in words")],
+    )
+
+    async def collect():
+        stream = await llm_executor.aexecute_stream(prompt)
+        return [chunk async for chunk in stream], stream
+
+    chunks, stream = asyncio.run(collect())
+
+    assert chunks
+    assert "".join(chunks) == stream.final_response.text()
+    assert "three" in stream.final_response.text().lower()
@@ -182,3 +182,40 @@ def test_tool_with_no_params():
 
     parsed = tool_belt.parse_call(tool_call)
     assert parsed == {}
+
+
+def test_tool_schema_is_built_once():
+    tool = Tool(name="get_weather", description="Get weather", params=WeatherParams)
+
+    assert tool.schema == WeatherParams.model_json_schema()
+    assert tool.schema is tool.schema
+
+
+def test_tool_schema_follows_reassigned_params():
+    tool = Tool(name="get_weather", description="Get weather", params=WeatherParams)
+    assert tool.schema == WeatherParams.model_json_schema()
+
+    tool.params = {"type": "object", "properties": {"city": {"type": "string"}}}
+
+    assert tool.schema == tool.params
+
+
+def test_tools_sharing_a_model_share_its_schema():
+    first = Tool(name="get_weather", description="Get weather", params=WeatherParams)
+    second = Tool(name="forecast", description="Forecast", params=WeatherParams)
+
+    assert first.schema is second.schema
+
+
+def test_parse_tool_call_validates_raw_json_arguments():
+    """Test raw provider JSON is validated directly into the pydantic model"""
+    weather_tool = Tool(name="get_weather", description="Get weather", params=WeatherParams)
+    tool_belt = ToolBelt([weather_tool])
+
+    tool_call = ToolCall(
+        name="get_weather",
+        arguments={"location": "Oslo"},
+        raw_arguments='{"location": "Oslo"}',
+    )
+
+    assert tool_belt.parse_call(tool_call) == WeatherParams(location="Oslo")